@@ -15,16 +15,27 @@ from docx.oxml import OxmlElement
 import base64
 import html
 import concurrent.futures
-from typing import List, Dict, Tuple, Set, Any, Optional
+from typing import List, Dict, Tuple, Set, FrozenSet, Any, Optional
 import hashlib
 import time
-from collections import Counter
+from collections import Counter, OrderedDict
 import functools
 import logging
 from pathlib import Path
 import sqlite3
 from contextlib import contextmanager
 import requests
+import sys
+import marshal
+import argparse
+import threading
+import queue
+import zlib
+import gzip
+import math
+import atexit
+import unicodedata
+import string
 
 # Настройка логирования
 logging.basicConfig(
@@ -43,6 +54,7 @@ class Config:
     # Пути к файлам
     DB_PATH = "doi_cache.db"
     LTWA_CSV_PATH = "ltwa.csv"
+    LTWA_SNAPSHOT_PATH = "ltwa.snapshot"
     USER_PREFS_DB = "user_preferences.db"
     
     # Настройки API
@@ -52,6 +64,35 @@ class Config:
     
     # Кэширование
     CACHE_TTL_HOURS = 24 * 7  # 1 неделя
+    CACHE_STALE_WHILE_REVALIDATE = True  # Отдавать записи старше TTL и обновлять их в фоне
+    CACHE_HARD_TTL_HOURS = 24 * 90  # Позже этого срока с момента получения запись не отдается
+    CACHE_REFRESH_WORKERS = 2  # Потоков фонового обновления
+    CACHE_REFRESH_MAX_PENDING = 100  # Обновлений в работе одновременно
+    CACHE_BUSY_TIMEOUT_SECONDS = 30  # Ожидание блокировки SQLite
+    CACHE_MEMORY_MAX_ENTRIES = 5000  # Метаданные DOI в памяти процесса
+    CACHE_MEMORY_MAX_BYTES = 32 * 1024 * 1024
+    CACHE_WRITE_QUEUE_SIZE = 2000  # Записей в очереди отложенной записи
+    CACHE_WRITE_BATCH_SIZE = 200  # Записей в одной транзакции
+    CACHE_TOUCH_FLUSH_SECONDS = 30  # Период сброса отметок доступа
+    CACHE_TOUCH_MIN_AGE_SECONDS = 3600  # Более свежую отметку не обновляем
+    CACHE_COMPRESSION_LEVEL = 6  # Уровень zlib для метаданных в SQLite
+    CACHE_MAX_ROWS = 100000  # Предел строк doi_cache
+    CACHE_MAX_BYTES = 256 * 1024 * 1024  # Предел суммарного размера метаданных в doi_cache
+    CACHE_PIN_HITS = 5  # Строки с таким числом попаданий вытесняются последними
+    CACHE_MAINTENANCE_SECONDS = 300  # Период вытеснения и incremental_vacuum
+    CACHE_VACUUM_STEP_PAGES = 256  # Страниц, освобождаемых за один шаг
+    CACHE_IMPORT_BATCH_SIZE = 5000  # Строк в одной транзакции импорта
+    CACHE_BLOOM_ENABLED = False  # Фильтр Блума DOI перед SQLite (с проверкой свежести не быстрее индекса SQLite)
+    CACHE_BLOOM_REBUILD_SECONDS = 30  # Не чаще - перестроение фильтра после вставок других процессов
+    CACHE_BLOOM_ERROR_RATE = 0.01  # Доля ложных срабатываний фильтра Блума DOI
+    JOURNAL_ABBREVIATION_CACHE_SIZE = 4096  # Названий журналов в памяти
+    RESOLUTION_CACHE_TTL_HOURS = 24 * 30  # Найденные по тексту ссылки DOI
+    # Срок хранения отрицательных результатов по причине неудачи
+    NEGATIVE_CACHE_TTL_SECONDS = {
+        'not_found': 6 * 3600,
+        'malformed': 24 * 3600,
+        'timeout': 10 * 60
+    }
     
     # Валидация
     MIN_REFERENCES_FOR_STATS = 5
@@ -738,72 +779,1285 @@ TRANSLATIONS = {
     }
 }
 
+# Кэш в памяти
+class LRUCache:
+    """Потокобезопасный LRU-кэш ограниченного размера со счетчиками попаданий.
+    
+    Размер ограничивается числом записей и, если задан max_bytes, суммарным
+    размером значений, который передается в set. Запись с expires_at
+    (время Unix) после этого момента считается отсутствующей.
+    """
+    
+    def __init__(self, max_entries: int, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Ключ -> (значение, размер, expires_at)
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key, default=None):
+        """Возвращает значение и помечает его как недавно использованное"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at is None or time.time() < expires_at:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return default
+    
+    def set(self, key, value, size: int = 0, expires_at: Optional[float] = None):
+        """Сохраняет значение, вытесняя самые давние записи при переполнении"""
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, size, expires_at)
+            self.total_bytes += size
+            while len(self._data) > self.max_entries or (
+                    self.max_bytes is not None and self.total_bytes > self.max_bytes and len(self._data) > 1):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    def discard(self, key):
+        """Удаляет запись, если она есть"""
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+    
+    def _remove(self, key):
+        """Удаляет запись (вызывается под блокировкой)"""
+        _, size, _ = self._data.pop(key)
+        self.total_bytes -= size
+    
+    def clear(self):
+        """Очищает кэш (счетчики сохраняются)"""
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики попаданий, промахов и вытеснений"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_entries': self.max_entries,
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+class BloomFilter:
+    """Фильтр Блума для строковых ключей: "точно нет" или "возможно есть".
+    
+    Размер рассчитывается по ожидаемому числу ключей и доле ложных
+    срабатываний; удаление ключей не поддерживается. Используется
+    встроенный hash строки (он кэшируется в объекте строки), поэтому
+    фильтр действителен только внутри процесса и строится в нем заново.
+    """
+    
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def _positions(self, key: str):
+        # Двойное хеширование: k позиций из двух 32-битных половин одного хеша
+        value = hash(key)
+        first = value & 0xFFFFFFFF
+        second = (value >> 32) | 1
+        size = self.size
+        return [(first + i * second) % size for i in range(self.hash_count)]
+    
+    def add(self, key: str):
+        positions = self._positions(key)
+        # Установка бита - чтение и запись байта, без блокировки биты соседних ключей терялись бы
+        with self._lock:
+            for position in positions:
+                self.bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+    
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        value = hash(key)
+        first = value & 0xFFFFFFFF
+        second = (value >> 32) | 1
+        size = self.size
+        # Для отсутствующего ключа проверка обычно заканчивается на первых позициях
+        for i in range(self.hash_count):
+            position = (first + i * second) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+    
+    def expected_error_rate(self) -> float:
+        """Теоретическая доля ложных срабатываний при текущем числе добавленных ключей"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+class SQLiteStore:
+    """Базовый класс хранилищ SQLite с постоянным соединением в каждом потоке"""
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Соединение текущего потока: открывается один раз и переиспользуется.
+        
+        WAL позволяет читать во время записи, synchronous=NORMAL убирает fsync
+        на каждую транзакцию, а timeout задает ожидание занятой базы вместо
+        ошибки "database is locked". auto_vacuum=INCREMENTAL действует только
+        на новый файл базы; существующий переводится командой
+        enable-incremental-vacuum.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=Config.CACHE_BUSY_TIMEOUT_SECONDS)
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
 # Кэширование DOI
-class DOICache:
-    """Кэш для хранения метаданных DOI"""
+class DOICache(SQLiteStore):
+    """Кэш для хранения метаданных DOI.
+    
+    Два уровня: LRU в памяти процесса (ограничен числом записей и байтами)
+    перед SQLite. Запись идет в оба уровня; запись в памяти живет не дольше,
+    чем строка в SQLite, поэтому память никогда не отдает данные, которые
+    база уже считает устаревшими.
+    
+    В память запись попадает сразу, а в SQLite - через ограниченную очередь,
+    которую один поток-писатель сбрасывает пакетными транзакциями. Когда
+    очередь заполнена, set ждет (обратное давление). Перед завершением
+    процесса очередь сбрасывается (close, зарегистрирован в atexit).
+    
+    Чтение не пишет в базу: DOI, к которым обращались, копятся в памяти, и
+    тот же поток раз в CACHE_TOUCH_FLUSH_SECONDS обновляет accessed_epoch
+    одним пакетом, причем только у строк со старой отметкой.
+    
+    Метаданные хранятся как BLOB: байт формата и сжатый zlib компактный JSON.
+    Строки прежних версий (JSON-текст) читаются как есть и при следующем
+    сбросе отметок переписываются в сжатом виде.
+    
+    Рядом с метаданными хранится исходная запись Crossref (raw, в том же
+    формате) и версия извлечения. Если DOIProcessor.EXTRACTOR_VERSION
+    изменилась, метаданные заново извлекаются из raw при чтении, без
+    обращения к сети, и перезаписываются при сбросе отметок.
+    
+    Форма словаря метаданных версионируется (schema_version, SCHEMA_VERSION).
+    Строки старой версии поднимаются при чтении функциями upgrade_metadata
+    и перезаписываются тем же путем; команда migrate делает это для всей
+    таблицы небольшими транзакциями, не останавливая работу сессий.
+    
+    Размер базы ограничен CACHE_MAX_ROWS и CACHE_MAX_BYTES. Сверх предела
+    вытесняются сначала строки с числом попаданий меньше CACHE_PIN_HITS, а
+    среди них - давно не читанные. Освободившиеся страницы возвращаются
+    файлу небольшими шагами incremental_vacuum, не мешая читателям WAL
+    (базу, созданную до этого режима, переводит команда
+    enable-incremental-vacuum).
+    
+    Фильтр Блума по DOI (CACHE_BLOOM_ENABLED, по умолчанию выключен)
+    строится при запуске, пополняется при записи и перестраивается при
+    обслуживании. DOI, которых точно нет в фильтре, не ищутся в SQLite.
+    DOI из очереди записи добавляются в каждый перестроенный фильтр, пока
+    не окажутся в таблице. Триггер считает вставки новых строк в
+    doi_cache_generation; если счетчик изменил другой процесс (реплика,
+    import-cache), отрицательному ответу фильтра не верят и ищут в SQLite,
+    пока фильтр не перестроится (не чаще CACHE_BLOOM_REBUILD_SECONDS).
+    """
+    
+    # Число параметров в одном запросе IN (...), ниже лимита SQLite
+    QUERY_CHUNK_SIZE = 500
+    # Первый байт значения metadata
+    PAYLOAD_ZLIB_JSON = 1
+    # Версия формы словаря метаданных (строки без версии считаются версией 0)
+    SCHEMA_VERSION = 1
     
     def __init__(self, db_path: str = Config.DB_PATH):
-        self.db_path = db_path
+        super().__init__(db_path)
+        self.memory = LRUCache(Config.CACHE_MEMORY_MAX_ENTRIES, Config.CACHE_MEMORY_MAX_BYTES)
+        self._stats_lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.stale_hits = 0
+        self._touch_lock = threading.Lock()
+        self._touched: Dict[str, int] = {}
+        # DOI -> (метаданные, версия извлечения или None, created_epoch прочитанной строки)
+        self._rewrites: Dict[str, Tuple[bytes, Optional[int], Optional[int]]] = {}
+        self._last_touch_flush = time.monotonic()
+        # Первое обслуживание - не раньше чем через CACHE_MAINTENANCE_SECONDS после запуска
+        self._last_maintenance = time.monotonic()
+        self.evictions = 0
+        self.bloom_skipped = 0
+        self.bloom_false_positives = 0
+        self._bloom_lock = threading.Lock()
+        self._bloom_rebuild_lock = threading.Lock()
+        self.bloom: Optional[BloomFilter] = None
+        self._bloom_added_during_rebuild: Optional[List[str]] = None
+        # DOI, поставленные в очередь записи, но еще не записанные (DOI -> число записей в очереди)
+        self._bloom_pending: Dict[str, int] = {}
+        # Значение doi_cache_generation, которому соответствует фильтр, и
+        # собственные вставки (до, после), сделанные во время перестроения
+        self._bloom_generation: Optional[int] = None
+        self._bloom_generation_notes: Optional[List[Tuple[int, int]]] = None
+        self._bloom_stale = False
+        self._last_bloom_rebuild = time.monotonic()
         self._init_db()
+        self._rebuild_bloom()
+        self._write_queue: queue.Queue = queue.Queue(maxsize=Config.CACHE_WRITE_QUEUE_SIZE)
+        self._writer = threading.Thread(target=self._writer_loop, name="doi-cache-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
     
     def _init_db(self):
         """Инициализация базы данных"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS doi_cache (
                     doi TEXT PRIMARY KEY,
                     metadata TEXT NOT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    accessed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    accessed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    created_epoch INTEGER,
+                    accessed_epoch INTEGER,
+                    hit_count INTEGER NOT NULL DEFAULT 0,
+                    raw BLOB,
+                    extractor_version INTEGER,
+                    schema_version INTEGER
                 )
             ''')
+            self._migrate_schema(conn)
             conn.execute('CREATE INDEX IF NOT EXISTS idx_doi ON doi_cache(doi)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_accessed_at ON doi_cache(accessed_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_accessed_epoch ON doi_cache(accessed_epoch)')
+            # Индекс по текстовому времени не используется запросами с datetime()
+            conn.execute('DROP INDEX IF EXISTS idx_accessed_at')
+            if Config.CACHE_BLOOM_ENABLED:
+                # Счетчик вставок новых строк любым процессом: по нему фильтр Блума
+                # узнает о строках, которых в нем нет (обновление строки его не меняет)
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS doi_cache_generation '
+                    '(id INTEGER PRIMARY KEY CHECK (id = 0), value INTEGER NOT NULL)'
+                )
+                conn.execute('INSERT OR IGNORE INTO doi_cache_generation (id, value) VALUES (0, 0)')
+                conn.execute(
+                    'CREATE TRIGGER IF NOT EXISTS doi_cache_generation_insert AFTER INSERT ON doi_cache '
+                    'BEGIN UPDATE doi_cache_generation SET value = value + 1 WHERE id = 0; END'
+                )
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                logger.info(f"{self.db_path} does not return freed pages; run `python app.py enable-incremental-vacuum` once")
+    
+    def _migrate_schema(self, conn: sqlite3.Connection):
+        """Добавляет в базу прежних версий целочисленные метки времени (секунды Unix)"""
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(doi_cache)')}
+        if 'accessed_epoch' not in columns:
+            logger.info("Migrating doi_cache: adding epoch timestamp columns")
+            conn.execute('ALTER TABLE doi_cache ADD COLUMN created_epoch INTEGER')
+            conn.execute('ALTER TABLE doi_cache ADD COLUMN accessed_epoch INTEGER')
+            conn.execute('''
+                UPDATE doi_cache SET
+                    created_epoch = CAST(strftime('%s', created_at) AS INTEGER),
+                    accessed_epoch = CAST(strftime('%s', accessed_at) AS INTEGER)
+            ''')
+        if 'hit_count' not in columns:
+            logger.info("Migrating doi_cache: adding hit_count column")
+            conn.execute('ALTER TABLE doi_cache ADD COLUMN hit_count INTEGER NOT NULL DEFAULT 0')
+        if 'raw' not in columns:
+            # Для прежних строк исходной записи нет: они остаются как есть до обновления
+            logger.info("Migrating doi_cache: adding raw work and extractor version columns")
+            conn.execute('ALTER TABLE doi_cache ADD COLUMN raw BLOB')
+            conn.execute('ALTER TABLE doi_cache ADD COLUMN extractor_version INTEGER')
+        if 'schema_version' not in columns:
+            logger.info("Migrating doi_cache: adding schema_version column")
+            conn.execute('ALTER TABLE doi_cache ADD COLUMN schema_version INTEGER')
+    
+    def enable_incremental_vacuum(self) -> bool:
+        """Переводит существующий файл базы в auto_vacuum=INCREMENTAL одним VACUUM.
+        
+        VACUUM переписывает весь файл и на это время блокирует запись, поэтому
+        выполняется только командой enable-incremental-vacuum, а не при
+        запуске. Возвращает True, если файл был переведен.
+        """
+        self.flush()
+        conn = self._connect()
+        try:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+                return False
+            logger.info(f"Switching {self.db_path} to incremental auto-vacuum")
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Could not enable incremental vacuum: {e}")
+            return False
+    
+    @staticmethod
+    def _ttl_cutoff() -> int:
+        """Граница TTL: записи с более ранним временем доступа устарели"""
+        return int(time.time()) - Config.CACHE_TTL_HOURS * 3600
+    
+    @staticmethod
+    def _hard_ttl_cutoff() -> int:
+        """Граница жесткого срока: полученные раньше записи не отдаются даже как устаревшие"""
+        return int(time.time()) - Config.CACHE_HARD_TTL_HOURS * 3600
+    
+    @classmethod
+    def _encode_payload(cls, metadata: Dict) -> Tuple[bytes, int]:
+        """Кодирует метаданные; возвращает значение для SQLite и длину JSON"""
+        text = json.dumps(metadata, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return bytes((cls.PAYLOAD_ZLIB_JSON,)) + zlib.compress(text, Config.CACHE_COMPRESSION_LEVEL), len(text)
+    
+    @classmethod
+    def _decode_payload(cls, payload) -> Tuple[Dict, int]:
+        """Декодирует значение из SQLite (в том числе прежний JSON-текст); возвращает метаданные и длину JSON"""
+        if isinstance(payload, str):
+            return json.loads(payload), len(payload)
+        if payload[0] == cls.PAYLOAD_ZLIB_JSON:
+            text = zlib.decompress(payload[1:])
+            return json.loads(text), len(text)
+        raise ValueError(f"Unknown doi_cache payload format {payload[0]}")
+    
+    @staticmethod
+    def _derive(raw: Dict, doi: str) -> Dict:
+        """Извлечение метаданных из исходной записи Crossref (DOIProcessor определен ниже в модуле)"""
+        return DOIProcessor().derive_metadata(raw, doi)
+    
+    @classmethod
+    def _upgrade_metadata_v0(cls, metadata: Dict) -> Dict:
+        """0 -> 1: строки, записанные до версионирования, дополняются всеми ключами версии 1"""
+        return {**cls._metadata_defaults_v1(), **metadata}
+    
+    @staticmethod
+    def _metadata_defaults_v1() -> Dict:
+        """Ключи словаря метаданных версии 1 и значения по умолчанию.
+        
+        Словарь создается заново при каждом вызове: поднятые строки попадают в
+        общий для сессий кэш в памяти и не должны делить один список авторов.
+        """
+        return {
+            'authors': [], 'title': '', 'journal': '', 'year': None, 'volume': '', 'issue': '',
+            'pages': '', 'article_number': '', 'doi': '', 'original_doi': ''
+        }
+    
+    @classmethod
+    def upgrade_metadata(cls, metadata: Dict, version: Optional[int]) -> Dict:
+        """Поднимает словарь метаданных до SCHEMA_VERSION по одной версии за шаг"""
+        upgrades = {0: cls._upgrade_metadata_v0}
+        version = version or 0
+        while version < cls.SCHEMA_VERSION:
+            metadata = upgrades[version](metadata)
+            version += 1
+        return metadata
+    
+    def _decode_row(self, doi: str, payload, raw_payload=None, schema_version: Optional[int] = None,
+                    created_epoch: Optional[int] = None) -> Tuple[Dict, int]:
+        """Декодирует строку SQLite; raw_payload передается, только если версия извлечения устарела.
+        
+        Заново извлеченные и поднятые до текущей версии метаданные, а также
+        строки прежнего формата отмечаются для перезаписи при сбросе отметок.
+        """
+        metadata = None
+        extractor_version = None
+        if raw_payload is not None:
+            try:
+                metadata = self._derive(self._decode_payload(raw_payload)[0], doi)
+                extractor_version = DOIProcessor.EXTRACTOR_VERSION
+            except Exception as e:
+                logger.error(f"Re-deriving cached metadata failed for {doi}: {e}")
+        rewrite = metadata is not None
+        if metadata is None:
+            metadata, size = self._decode_payload(payload)
+            rewrite = isinstance(payload, str)
+            if (schema_version or 0) < self.SCHEMA_VERSION:
+                metadata = self.upgrade_metadata(metadata, schema_version)
+                rewrite = True
+        if rewrite:
+            encoded, size = self._encode_payload(metadata)
+            with self._touch_lock:
+                self._rewrites[doi] = (encoded, extractor_version, created_epoch)
+        return metadata, size
+    
+    def _load_row(self, doi: str, payload, accessed_epoch: int, raw_payload=None,
+                  schema_version: Optional[int] = None, created_epoch: Optional[int] = None) -> Dict:
+        """Декодирует строку SQLite и кладет ее в память"""
+        metadata, size = self._decode_row(doi, payload, raw_payload, schema_version, created_epoch)
+        self._remember(doi, metadata, size, accessed_epoch)
+        return metadata
+    
+    def _remember(self, doi: str, metadata: Dict, size: int, accessed_epoch: int):
+        """Кладет запись в память со сроком жизни строки в SQLite"""
+        self.memory.set(doi, metadata, size=size,
+                        expires_at=accessed_epoch + Config.CACHE_TTL_HOURS * 3600)
+    
+    def _count_disk(self, hits: int, misses: int, stale_hits: int = 0):
+        with self._stats_lock:
+            self.disk_hits += hits
+            self.disk_misses += misses
+            self.stale_hits += stale_hits
+    
+    def _rebuild_bloom(self):
+        """Строит фильтр Блума по всем DOI таблицы; DOI из очереди и добавленные во время построения не теряются"""
+        if not Config.CACHE_BLOOM_ENABLED:
+            return
+        with self._bloom_rebuild_lock:
+            self._last_bloom_rebuild = time.monotonic()
+            with self._bloom_lock:
+                self._bloom_added_during_rebuild = []
+                self._bloom_generation_notes = []
+                self._bloom_stale = False
+            try:
+                with self._connect() as conn:
+                    # Счетчик и DOI читаются из одного снимка базы
+                    conn.execute('BEGIN')
+                    generation = self._read_generation(conn)
+                    rows = conn.execute('SELECT COUNT(*) FROM doi_cache').fetchone()[0]
+                    # Запас по размеру на рост таблицы до следующего перестроения
+                    bloom = BloomFilter(max(Config.CACHE_MAX_ROWS, rows * 2), Config.CACHE_BLOOM_ERROR_RATE)
+                    for (doi,) in conn.execute('SELECT doi FROM doi_cache'):
+                        bloom.add(doi)
+            except Exception as e:
+                logger.error(f"Cache Bloom filter rebuild error: {e}")
+                with self._bloom_lock:
+                    self._bloom_added_during_rebuild = None
+                    self._bloom_generation_notes = None
+                return
+            with self._bloom_lock:
+                for doi in self._bloom_added_during_rebuild:
+                    bloom.add(doi)
+                # Записи из очереди могли быть добавлены до начала перестроения
+                for doi in self._bloom_pending:
+                    bloom.add(doi)
+                # Собственные вставки после снимка уже есть в фильтре; вставки,
+                # попавшие в снимок, имеют after <= generation и пропускаются
+                for before, after in self._bloom_generation_notes:
+                    if before == generation:
+                        generation = after
+                self._bloom_added_during_rebuild = None
+                self._bloom_generation_notes = None
+                self._bloom_generation = generation
+                self.bloom = bloom
+    
+    @staticmethod
+    def _read_generation(conn: sqlite3.Connection) -> int:
+        """Текущее значение счетчика вставок doi_cache_generation"""
+        return conn.execute('SELECT value FROM doi_cache_generation WHERE id = 0').fetchone()[0]
+    
+    def _insert_rows(self, conn: sqlite3.Connection, sql: str, rows: List[Tuple]) -> int:
+        """Вставка строк этого процесса; возвращает число измененных строк.
+        
+        Счетчик читается до и после вставки в одной транзакции записи, поэтому
+        фильтр Блума отличает свои вставки (их DOI в нем уже есть) от чужих.
+        """
+        if not Config.CACHE_BLOOM_ENABLED:
+            return conn.executemany(sql, rows).rowcount
+        conn.execute('BEGIN IMMEDIATE')
+        before = self._read_generation(conn)
+        changed = conn.executemany(sql, rows).rowcount
+        after = self._read_generation(conn)
+        conn.commit()
+        with self._bloom_lock:
+            if self._bloom_generation_notes is not None:
+                self._bloom_generation_notes.append((before, after))
+            if self._bloom_generation == before:
+                self._bloom_generation = after
+        return changed
+    
+    def _bloom_is_current(self, conn: sqlite3.Connection) -> bool:
+        """Проверяет, что после построения фильтра не было чужих вставок; иначе просит перестроить его"""
+        if self._read_generation(conn) == self._bloom_generation:
+            return True
+        self._bloom_stale = True
+        return False
+    
+    def _bloom_add(self, dois, pending: bool = False):
+        """Добавляет DOI в фильтр Блума (и в строящийся фильтр); pending - DOI ждут записи в очереди"""
+        with self._bloom_lock:
+            for doi in dois:
+                if self.bloom is not None:
+                    self.bloom.add(doi)
+                if self._bloom_added_during_rebuild is not None:
+                    self._bloom_added_during_rebuild.append(doi)
+                if pending:
+                    self._bloom_pending[doi] = self._bloom_pending.get(doi, 0) + 1
+    
+    def _bloom_written(self, dois):
+        """Снимает отметку ожидания записи с DOI, попавших в таблицу"""
+        with self._bloom_lock:
+            for doi in dois:
+                count = self._bloom_pending.get(doi, 0) - 1
+                if count > 0:
+                    self._bloom_pending[doi] = count
+                else:
+                    self._bloom_pending.pop(doi, None)
+    
+    def _touch(self, dois, now: int):
+        """Запоминает обращение и считает попадания; в базу они попадут при сбросе отметок"""
+        with self._touch_lock:
+            for doi in dois:
+                entry = self._touched.get(doi)
+                if entry is None:
+                    self._touched[doi] = [now, 1]
+                else:
+                    entry[0] = now
+                    entry[1] += 1
+    
+    def _flush_touches(self):
+        """Обновляет accessed_epoch накопленных DOI и перезаписывает обновленные при чтении строки одной транзакцией"""
+        with self._touch_lock:
+            touched, self._touched = self._touched, {}
+            rewrites, self._rewrites = self._rewrites, {}
+        self._last_touch_flush = time.monotonic()
+        if not touched and not rewrites:
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    '''
+                    UPDATE doi_cache SET
+                        hit_count = hit_count + ?,
+                        accessed_epoch = CASE WHEN accessed_epoch < ? THEN ? ELSE accessed_epoch END
+                    WHERE doi = ?
+                    ''',
+                    [(hits, now - Config.CACHE_TOUCH_MIN_AGE_SECONDS, now, doi) for doi, (now, hits) in touched.items()]
+                )
+                # Строка, замененная после чтения (другой created_epoch), не трогается
+                conn.executemany(
+                    '''
+                    UPDATE doi_cache SET
+                        metadata = ?,
+                        schema_version = ?,
+                        extractor_version = COALESCE(?, extractor_version)
+                    WHERE doi = ? AND created_epoch IS ?
+                    ''',
+                    [
+                        (payload, self.SCHEMA_VERSION, extractor_version, doi, created_epoch)
+                        for doi, (payload, extractor_version, created_epoch) in rewrites.items()
+                    ]
+                )
+        except Exception as e:
+            logger.error(f"Cache deferred update error for {len(touched) + len(rewrites)} DOIs: {e}")
     
     def get(self, doi: str) -> Optional[Dict]:
         """Получение метаданных из кэша"""
+        return self.lookup(doi)[0]
+    
+    def get_many(self, dois: List[str]) -> Dict[str, Dict]:
+        """Получение метаданных для списка DOI (устаревшие записи включаются, см. lookup_many)"""
+        return self.lookup_many(dois)[0]
+    
+    def lookup(self, doi: str) -> Tuple[Optional[Dict], bool]:
+        """Метаданные DOI и признак того, что запись устарела"""
+        found, stale = self.lookup_many([doi])
+        return found.get(doi), doi in stale
+    
+    def lookup_many(self, dois: List[str]) -> Tuple[Dict[str, Dict], Set[str]]:
+        """Получение метаданных: сначала память, затем IN (...) по частям.
+        
+        Возвращает найденные метаданные и множество устаревших DOI. Запись
+        старше TTL отдается как устаревшая (stale-while-revalidate), пока с
+        момента ее получения из Crossref не прошло CACHE_HARD_TTL_HOURS.
+        Устаревшие записи не попадают в память и не продлеваются обращением.
+        """
+        now = int(time.time())
+        found = {}
+        stale = set()
+        missing = []
+        for doi in dict.fromkeys(dois):
+            metadata = self.memory.get(doi)
+            if metadata is not None:
+                found[doi] = metadata
+            else:
+                missing.append(doi)
+        self._touch(found, now)
+        if not missing:
+            return found, stale
+        
+        from_disk = []
+        bloom = None
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
+                # Отрицательному ответу фильтра можно верить, только если с его
+                # построения в таблицу не добавлял строк никто, кроме этого процесса
+                if self.bloom is not None and self._bloom_is_current(conn):
+                    bloom = self.bloom
+                    candidates = [doi for doi in missing if doi in bloom]
+                    with self._stats_lock:
+                        self.bloom_skipped += len(missing) - len(candidates)
+                        self.disk_misses += len(missing) - len(candidates)
+                    missing = candidates
+                cutoff = self._ttl_cutoff()
+                hard_cutoff = self._hard_ttl_cutoff() if Config.CACHE_STALE_WHILE_REVALIDATE else now
+                for start in range(0, len(missing), self.QUERY_CHUNK_SIZE):
+                    chunk = missing[start:start + self.QUERY_CHUNK_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    # raw читается только для строк с устаревшей версией извлечения
+                    rows = conn.execute(
+                        f'SELECT doi, metadata, accessed_epoch, '
+                        f'CASE WHEN extractor_version IS NOT ? THEN raw END, schema_version, created_epoch '
+                        f'FROM doi_cache WHERE doi IN ({placeholders}) '
+                        f'AND (accessed_epoch > ? OR created_epoch > ?)',
+                        (DOIProcessor.EXTRACTOR_VERSION, *chunk, cutoff, hard_cutoff)
+                    ).fetchall()
+                    for doi, payload, accessed_epoch, raw_payload, schema_version, created_epoch in rows:
+                        if accessed_epoch > cutoff:
+                            found[doi] = self._load_row(doi, payload, accessed_epoch, raw_payload,
+                                                        schema_version, created_epoch)
+                            from_disk.append(doi)
+                        else:
+                            found[doi] = self._decode_row(doi, payload, raw_payload, schema_version, created_epoch)[0]
+                            stale.add(doi)
+            self._touch(from_disk, now)
+            not_found = len(missing) - len(from_disk) - len(stale)
+            self._count_disk(len(from_disk), not_found, len(stale))
+            if bloom is not None:
+                with self._stats_lock:
+                    self.bloom_false_positives += not_found
+        except Exception as e:
+            logger.error(f"Cache get_many error: {e}")
+        return found, stale
+    
+    def set(self, doi: str, metadata: Dict, raw: Optional[Dict] = None):
+        """Сохранение метаданных (и исходной записи Crossref) в кэш"""
+        self.set_many([(doi, metadata, raw)])
+    
+    def set_many(self, items: List[Tuple]):
+        """Сохранение списка (DOI, метаданные[, исходная запись Crossref]): сразу в память, в SQLite - через очередь"""
+        if not items:
+            return
+        try:
+            now = int(time.time())
+            for doi, metadata, *rest in items:
+                raw = rest[0] if rest else None
+                payload, size = self._encode_payload(metadata)
+                raw_payload = self._encode_payload(raw)[0] if raw is not None else None
+                self._remember(doi, metadata, size, now)
+                self._bloom_add((doi,), pending=True)
+                # Блокируется, пока писатель не освободит место в очереди
+                self._write_queue.put((doi, payload, raw_payload, now))
+        except Exception as e:
+            logger.error(f"Cache set_many error for {len(items)} DOIs: {e}")
+    
+    def _writer_loop(self):
+        """Поток-писатель: собирает записи из очереди и пишет их пакетами"""
+        while True:
+            try:
+                row = self._write_queue.get(timeout=Config.CACHE_TOUCH_FLUSH_SECONDS)
+            except queue.Empty:
+                self._flush_touches()
+                self._maybe_maintain()
+                continue
+            if row is None:
+                self._flush_touches()
+                self._write_queue.task_done()
+                return
+            rows = [row]
+            stop = False
+            while len(rows) < Config.CACHE_WRITE_BATCH_SIZE:
+                try:
+                    row = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if row is None:
+                    stop = True
+                    break
+                rows.append(row)
+            try:
+                self._write_rows(rows)
+            finally:
+                self._bloom_written(row[0] for row in rows)
+                for _ in range(len(rows) + stop):
+                    self._write_queue.task_done()
+            if stop:
+                self._flush_touches()
+                return
+            if time.monotonic() - self._last_touch_flush >= Config.CACHE_TOUCH_FLUSH_SECONDS:
+                self._flush_touches()
+            self._maybe_maintain()
+    
+    def _maybe_maintain(self):
+        """Запускает обслуживание из потока-писателя не чаще CACHE_MAINTENANCE_SECONDS"""
+        if time.monotonic() - self._last_maintenance >= Config.CACHE_MAINTENANCE_SECONDS:
+            self._last_maintenance = time.monotonic()
+            self.enforce_limits()
+            self.incremental_vacuum()
+            # Убирает вытесненные DOI и добавляет записанные другими процессами
+            self._rebuild_bloom()
+        elif self._bloom_stale and time.monotonic() - self._last_bloom_rebuild >= Config.CACHE_BLOOM_REBUILD_SECONDS:
+            # Другой процесс добавил строки: до перестроения поиск идет мимо фильтра
+            self._rebuild_bloom()
+    
+    def enforce_limits(self) -> int:
+        """Вытесняет строки сверх CACHE_MAX_ROWS и CACHE_MAX_BYTES; возвращает их число"""
+        # Счетчики попаданий должны быть в базе до выбора жертв
+        self._flush_touches()
+        victims = []
+        try:
+            with self._connect() as conn:
+                rows, size = conn.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(length(metadata) + COALESCE(length(raw), 0)), 0) FROM doi_cache'
+                ).fetchone()
+                excess_rows = rows - Config.CACHE_MAX_ROWS
+                excess_bytes = size - Config.CACHE_MAX_BYTES
+                if excess_rows <= 0 and excess_bytes <= 0:
+                    return 0
+                # Сначала редко читаемые строки, среди них - давно не читанные
+                candidates = conn.execute(
+                    'SELECT doi, length(metadata) + COALESCE(length(raw), 0) FROM doi_cache '
+                    'ORDER BY hit_count >= ?, accessed_epoch, hit_count',
+                    (Config.CACHE_PIN_HITS,)
+                )
+                for doi, length in candidates:
+                    if len(victims) >= excess_rows and excess_bytes <= 0:
+                        break
+                    victims.append(doi)
+                    excess_bytes -= length
+                conn.executemany('DELETE FROM doi_cache WHERE doi = ?', [(doi,) for doi in victims])
+            for doi in victims:
+                self.memory.discard(doi)
+            with self._stats_lock:
+                self.evictions += len(victims)
+            logger.info(f"Evicted {len(victims)} entries from doi_cache")
+        except Exception as e:
+            logger.error(f"Cache eviction error: {e}")
+            return 0
+        return len(victims)
+    
+    def incremental_vacuum(self):
+        """Возвращает файлу свободные страницы короткими шагами, чтобы не держать блокировку записи"""
+        try:
+            conn = self._connect()
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                return
+            free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            while free_pages > 0:
+                # executescript выполняет прагму до конца (execute делает один шаг)
+                conn.executescript(f'PRAGMA incremental_vacuum({Config.CACHE_VACUUM_STEP_PAGES});')
+                remaining = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                if remaining >= free_pages:
+                    break
+                free_pages = remaining
+        except Exception as e:
+            logger.error(f"Cache incremental vacuum error: {e}")
+    
+    def _write_rows(self, rows: List[Tuple[str, bytes, Optional[bytes], int]]):
+        """Запись пакета (DOI, сжатые метаданные, сжатая исходная запись, время) одной транзакцией"""
+        try:
+            with self._connect() as conn:
+                # Повторная запись DOI (например, обновление устаревшей строки)
+                # не сбрасывает hit_count: иначе часто читаемые строки теряли бы
+                # защиту от вытеснения именно при обновлении
+                self._insert_rows(
+                    conn,
+                    'INSERT INTO doi_cache '
+                    '(doi, metadata, raw, extractor_version, schema_version, created_epoch, accessed_epoch) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT(doi) DO UPDATE SET metadata = excluded.metadata, raw = excluded.raw, '
+                    'extractor_version = excluded.extractor_version, schema_version = excluded.schema_version, '
+                    'created_epoch = excluded.created_epoch, accessed_epoch = excluded.accessed_epoch',
+                    [
+                        (doi, payload, raw_payload, DOIProcessor.EXTRACTOR_VERSION if raw_payload is not None else None,
+                         self.SCHEMA_VERSION, now, now)
+                        for doi, payload, raw_payload, now in rows
+                    ]
+                )
+        except Exception as e:
+            logger.error(f"Cache write error for {len(rows)} DOIs: {e}")
+    
+    def flush(self):
+        """Ждет, пока все поставленные в очередь записи окажутся в SQLite"""
+        if self._writer.is_alive():
+            self._write_queue.join()
+    
+    def close(self):
+        """Сбрасывает очередь и останавливает поток-писатель"""
+        if self._writer.is_alive():
+            self._write_queue.put(None)
+            self._writer.join()
+    
+    def distinct_journals(self) -> Set[str]:
+        """Все названия журналов, встречающиеся в кэше"""
+        self.flush()
+        journals = set()
+        with self._connect() as conn:
+            for (payload,) in conn.execute('SELECT metadata FROM doi_cache'):
+                try:
+                    journal = self._decode_payload(payload)[0].get('journal')
+                except (ValueError, zlib.error):
+                    continue
+                if journal:
+                    journals.add(journal)
+        return journals
+    
+    def clear(self) -> bool:
+        """Удаление всех записей без удаления файла базы, открытого другими сессиями"""
+        try:
+            # Иначе записи из очереди попадут в базу уже после очистки
+            self.flush()
+            with self._connect() as conn:
+                conn.execute('DELETE FROM doi_cache')
+            self.memory.clear()
+            self._rebuild_bloom()
+            return True
+        except Exception as e:
+            logger.error(f"Cache clear error: {e}")
+            return False
+    
+    def clear_old_entries(self):
+        """Очистка устаревших записей"""
+        # Недавние обращения, еще не записанные в базу, продлевают жизнь строк
+        self._flush_touches()
+        try:
+            with self._connect() as conn:
+                # Устаревшие записи удаляются только после жесткого срока
+                conn.execute(
+                    'DELETE FROM doi_cache WHERE accessed_epoch <= ? AND (created_epoch IS NULL OR created_epoch <= ?)',
+                    (self._ttl_cutoff(), self._hard_ttl_cutoff() if Config.CACHE_STALE_WHILE_REVALIDATE else int(time.time()))
+                )
+        except Exception as e:
+            logger.error(f"Cache cleanup error: {e}")
+    
+    def export_jsonl(self, path: str) -> int:
+        """Потоковая выгрузка кэша в gzip JSONL: одна запись (DOI, метаданные, исходная запись, метки времени) на строку"""
+        self.flush()
+        count = 0
+        with gzip.open(path, 'wt', encoding='utf-8') as output:
+            rows = self._connect().execute(
+                'SELECT doi, metadata, raw, extractor_version, schema_version, created_epoch, accessed_epoch FROM doi_cache'
+            )
+            for doi, payload, raw_payload, extractor_version, schema_version, created_epoch, accessed_epoch in rows:
+                try:
+                    metadata = self._decode_payload(payload)[0]
+                    raw = self._decode_payload(raw_payload)[0] if raw_payload is not None else None
+                except (ValueError, zlib.error):
+                    logger.warning(f"Skipping undecodable cache entry {doi}")
+                    continue
+                record = {
+                    'doi': doi,
+                    'metadata': metadata,
+                    'schema_version': schema_version,
+                    'created_epoch': created_epoch,
+                    'accessed_epoch': accessed_epoch
+                }
+                if raw is not None:
+                    record['raw'] = raw
+                    record['extractor_version'] = extractor_version
+                output.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+                output.write('\n')
+                count += 1
+        return count
+    
+    def import_jsonl(self, path: str) -> Tuple[int, int]:
+        """Потоковая загрузка gzip JSONL пакетами транзакций.
+        
+        Существующая запись заменяется, только если импортируемая получена
+        из Crossref позже (created_epoch); время доступа берется большее.
+        Возвращает число прочитанных и число записанных строк.
+        """
+        self.flush()
+        read = written = 0
+        batch = []
+        
+        def write_batch():
+            nonlocal written
+            # В фильтр до записи: лишний DOI в фильтре дает только ложное срабатывание
+            self._bloom_add(row[0] for row in batch)
+            with self._connect() as conn:
+                written += self._insert_rows(
+                    conn,
+                    '''
+                    INSERT INTO doi_cache (doi, metadata, raw, extractor_version, schema_version, created_epoch, accessed_epoch)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(doi) DO UPDATE SET
+                        metadata = excluded.metadata,
+                        raw = excluded.raw,
+                        extractor_version = excluded.extractor_version,
+                        schema_version = excluded.schema_version,
+                        created_epoch = excluded.created_epoch,
+                        accessed_epoch = MAX(COALESCE(doi_cache.accessed_epoch, 0), excluded.accessed_epoch)
+                    WHERE excluded.created_epoch > COALESCE(doi_cache.created_epoch, 0)
+                    ''',
+                    batch
+                )
+            # В памяти могли остаться прежние версии замененных записей
+            for row in batch:
+                self.memory.discard(row[0])
+            batch.clear()
+        
+        with gzip.open(path, 'rt', encoding='utf-8') as source:
+            for line_number, line in enumerate(source, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    now = int(time.time())
+                    created_epoch = int(record.get('created_epoch') or now)
+                    accessed_epoch = int(record.get('accessed_epoch') or created_epoch)
+                    raw = record.get('raw')
+                    batch.append((
+                        record['doi'],
+                        self._encode_payload(record['metadata'])[0],
+                        self._encode_payload(raw)[0] if raw is not None else None,
+                        record.get('extractor_version') if raw is not None else None,
+                        record.get('schema_version'),
+                        created_epoch,
+                        accessed_epoch
+                    ))
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.warning(f"Skipping malformed line {line_number} in {path}: {e}")
+                    continue
+                read += 1
+                if len(batch) >= Config.CACHE_IMPORT_BATCH_SIZE:
+                    write_batch()
+        if batch:
+            write_batch()
+        self.enforce_limits()
+        return read, written
+    
+    def migrate(self, batch_size: int = 1000) -> int:
+        """Переписывает строки старого формата, схемы или версии извлечения пакетами.
+        
+        Каждый пакет - короткая транзакция, поэтому сессии продолжают читать
+        и писать кэш во время миграции. Возвращает число обработанных строк.
+        """
+        self.flush()
+        migrated = 0
+        last_doi = ''
+        while True:
+            try:
+                with self._connect() as conn:
+                    rows = conn.execute(
+                        '''
+                        SELECT doi, metadata, CASE WHEN extractor_version IS NOT ? THEN raw END,
+                               schema_version, created_epoch
+                        FROM doi_cache
+                        WHERE doi > ? AND (
+                            typeof(metadata) = 'text'
+                            OR COALESCE(schema_version, 0) < ?
+                            OR (raw IS NOT NULL AND extractor_version IS NOT ?)
+                        )
+                        ORDER BY doi LIMIT ?
+                        ''',
+                        (DOIProcessor.EXTRACTOR_VERSION, last_doi, self.SCHEMA_VERSION,
+                         DOIProcessor.EXTRACTOR_VERSION, batch_size)
+                    ).fetchall()
+            except Exception as e:
+                logger.error(f"Cache migration error: {e}")
+                break
+            if not rows:
+                break
+            for doi, payload, raw_payload, schema_version, created_epoch in rows:
+                try:
+                    self._decode_row(doi, payload, raw_payload, schema_version, created_epoch)
+                except (ValueError, zlib.error) as e:
+                    logger.warning(f"Skipping undecodable cache entry {doi}: {e}")
+            # Перезапись пакета одной транзакцией через общий путь отложенных обновлений
+            self._flush_touches()
+            migrated += len(rows)
+            last_doi = rows[-1][0]
+        return migrated
+    
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики попаданий по уровням: память и SQLite"""
+        bloom = self.bloom
+        with self._stats_lock:
+            disk_lookups = self.disk_hits + self.disk_misses
+            # Отсутствующие в базе DOI: отсеянные фильтром и ложно пропущенные им к SQLite
+            absent = self.bloom_skipped + self.bloom_false_positives
+            disk = {
+                'hits': self.disk_hits,
+                'misses': self.disk_misses,
+                'stale_hits': self.stale_hits,
+                'evictions': self.evictions,
+                'hit_rate': round(self.disk_hits / disk_lookups, 4) if disk_lookups else 0.0
+            }
+            bloom_stats = {
+                'keys': bloom.count if bloom else 0,
+                'skipped': self.bloom_skipped,
+                'false_positives': self.bloom_false_positives,
+                'false_positive_rate': round(self.bloom_false_positives / absent, 4) if absent else 0.0,
+                'expected_false_positive_rate': round(bloom.expected_error_rate(), 4) if bloom else 0.0
+            }
+        return {'memory': self.memory.stats(), 'disk': disk, 'bloom': bloom_stats}
+
+# Инициализация кэша (один экземпляр и одни соединения на процесс)
+@st.cache_resource
+def get_doi_cache() -> DOICache:
+    return DOICache()
+
+doi_cache = get_doi_cache()
+
+class JournalAbbreviationStore(SQLiteStore):
+    """Постоянное хранилище готовых сокращений названий журналов (в doi_cache.db)"""
+    
+    def __init__(self, db_path: str = Config.DB_PATH):
+        super().__init__(db_path)
+        self._init_db()
+    
+    def _init_db(self):
+        """Инициализация таблицы сокращений"""
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS journal_abbreviation (
+                    journal_key TEXT NOT NULL,
+                    style TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    abbreviation TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (journal_key, style)
+                )
+            ''')
+    
+    @staticmethod
+    def normalize_title(journal_name: str) -> str:
+        """Ключ названия: NFC и схлопнутые пробелы.
+        
+        Регистр не меняется, так как от него зависит результат сокращения.
+        """
+        return " ".join(unicodedata.normalize('NFC', journal_name).split())
+    
+    def get(self, journal_name: str, style: str, version: str) -> Optional[str]:
+        """Получение сокращения, вычисленного для той же версии данных LTWA"""
+        try:
+            with self._connect() as conn:
                 result = conn.execute(
-                    'SELECT metadata FROM doi_cache WHERE doi = ? AND datetime(accessed_at) > datetime("now", ?)',
-                    (doi, f"-{Config.CACHE_TTL_HOURS} hours")
+                    'SELECT abbreviation FROM journal_abbreviation WHERE journal_key = ? AND style = ? AND version = ?',
+                    (self.normalize_title(journal_name), style, version)
                 ).fetchone()
-                
                 if result:
-                    # Обновляем время доступа
-                    conn.execute(
-                        'UPDATE doi_cache SET accessed_at = CURRENT_TIMESTAMP WHERE doi = ?',
-                        (doi,)
-                    )
-                    return json.loads(result[0])
+                    return result[0]
         except Exception as e:
-            logger.error(f"Cache get error for {doi}: {e}")
+            logger.error(f"Abbreviation store get error for {journal_name}: {e}")
         return None
     
-    def set(self, doi: str, metadata: Dict):
-        """Сохранение метаданных в кэш"""
+    def get_many(self, journal_names: List[str], style: str, version: str) -> Dict[str, str]:
+        """Получение сохраненных сокращений для списка названий одним запросом"""
+        keys = {self.normalize_title(name): name for name in journal_names}
+        found = {}
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
+                key_list = list(keys)
+                # Ограничение SQLite на число параметров запроса
+                for start in range(0, len(key_list), 500):
+                    chunk = key_list[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f'SELECT journal_key, abbreviation FROM journal_abbreviation '
+                        f'WHERE style = ? AND version = ? AND journal_key IN ({placeholders})',
+                        (style, version, *chunk)
+                    ).fetchall()
+                    for journal_key, abbreviation in rows:
+                        found[keys[journal_key]] = abbreviation
+        except Exception as e:
+            logger.error(f"Abbreviation store get_many error: {e}")
+        return found
+    
+    def set(self, journal_name: str, style: str, version: str, abbreviation: str):
+        """Сохранение сокращения"""
+        self.set_many([(journal_name, style, abbreviation)], version)
+    
+    def set_many(self, items: List[Tuple[str, str, str]], version: str):
+        """Сохранение списка (название, стиль, сокращение) одной транзакцией"""
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO journal_abbreviation (journal_key, style, version, abbreviation) VALUES (?, ?, ?, ?)',
+                    [(self.normalize_title(name), style, version, abbreviation) for name, style, abbreviation in items]
+                )
+        except Exception as e:
+            logger.error(f"Abbreviation store set error: {e}")
+
+class NegativeCache(SQLiteStore):
+    """Отрицательные результаты сетевых запросов (в doi_cache.db) с коротким сроком хранения.
+    
+    Ключ - вид запроса ('doi' или 'reference') и его значение. Повторять
+    запрос до истечения срока имеет смысл только для временных причин.
+    """
+    
+    NOT_FOUND = 'not_found'
+    TIMEOUT = 'timeout'
+    MALFORMED = 'malformed'
+    TRANSIENT_REASONS = {TIMEOUT}
+    
+    def __init__(self, db_path: str = Config.DB_PATH):
+        super().__init__(db_path)
+        self._init_db()
+    
+    def _init_db(self):
+        """Инициализация таблицы отрицательных результатов"""
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS negative_cache (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    reason TEXT NOT NULL,
+                    expires_epoch INTEGER NOT NULL,
+                    PRIMARY KEY (kind, key)
+                )
+            ''')
+    
+    def get(self, kind: str, key: str) -> Optional[str]:
+        """Причина неудачи, если срок ее хранения не истек"""
+        return self.get_many(kind, [key]).get(key)
+    
+    def get_many(self, kind: str, keys: List[str]) -> Dict[str, str]:
+        """Причины неудач для списка ключей одного вида"""
+        found = {}
+        key_list = list(dict.fromkeys(keys))
+        try:
+            with self._connect() as conn:
+                now = int(time.time())
+                for start in range(0, len(key_list), DOICache.QUERY_CHUNK_SIZE):
+                    chunk = key_list[start:start + DOICache.QUERY_CHUNK_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f'SELECT key, reason FROM negative_cache '
+                        f'WHERE kind = ? AND expires_epoch > ? AND key IN ({placeholders})',
+                        (kind, now, *chunk)
+                    ).fetchall()
+                    found.update(rows)
+        except Exception as e:
+            logger.error(f"Negative cache get error: {e}")
+        return found
+    
+    def set(self, kind: str, key: str, reason: str):
+        """Запоминает неудачу на срок, заданный для ее причины"""
+        expires_epoch = int(time.time()) + Config.NEGATIVE_CACHE_TTL_SECONDS[reason]
+        try:
+            with self._connect() as conn:
                 conn.execute(
-                    'INSERT OR REPLACE INTO doi_cache (doi, metadata) VALUES (?, ?)',
-                    (doi, json.dumps(metadata))
+                    'INSERT OR REPLACE INTO negative_cache (kind, key, reason, expires_epoch) VALUES (?, ?, ?, ?)',
+                    (kind, key, reason, expires_epoch)
                 )
         except Exception as e:
-            logger.error(f"Cache set error for {doi}: {e}")
+            logger.error(f"Negative cache set error for {key}: {e}")
     
-    def clear_old_entries(self):
-        """Очистка устаревших записей"""
+    def clear(self) -> bool:
+        """Удаление всех отрицательных результатов"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM negative_cache')
+            return True
+        except Exception as e:
+            logger.error(f"Negative cache clear error: {e}")
+            return False
+    
+    def clear_expired(self):
+        """Удаление истекших записей"""
+        try:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM negative_cache WHERE expires_epoch <= ?', (int(time.time()),))
+        except Exception as e:
+            logger.error(f"Negative cache cleanup error: {e}")
+
+@st.cache_resource
+def get_negative_cache() -> NegativeCache:
+    return NegativeCache()
+
+negative_cache = get_negative_cache()
+
+class ReferenceResolutionCache(SQLiteStore):
+    """Найденные библиографическим поиском DOI по отпечатку текста ссылки (в doi_cache.db)"""
+    
+    # Номер ссылки в начале строки: 1. 1) (1) [1] или просто 1
+    NUMBERING_PATTERN = re.compile(r'^\s*(?:\[\d{1,4}\]|\(\d{1,4}\)|\d{1,4}[.)]|\d{1,3}(?=\s))\s*')
+    
+    def __init__(self, db_path: str = Config.DB_PATH):
+        super().__init__(db_path)
+        self._init_db()
+    
+    def _init_db(self):
+        """Инициализация таблицы найденных DOI"""
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS reference_resolution (
+                    fingerprint TEXT PRIMARY KEY,
+                    doi TEXT NOT NULL,
+                    created_epoch INTEGER NOT NULL
+                )
+            ''')
+    
+    @classmethod
+    def fingerprint(cls, reference: str) -> str:
+        """Отпечаток ссылки: без номера, со схлопнутыми пробелами, без учета регистра"""
+        text = unicodedata.normalize('NFC', reference)
+        text = cls.NUMBERING_PATTERN.sub('', text, count=1)
+        text = " ".join(text.split()).casefold()
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+    
+    def get(self, fingerprint: str) -> Optional[str]:
+        """DOI, найденный для ссылки с тем же отпечатком не позже TTL назад"""
+        try:
+            with self._connect() as conn:
+                result = conn.execute(
+                    'SELECT doi FROM reference_resolution WHERE fingerprint = ? AND created_epoch > ?',
+                    (fingerprint, int(time.time()) - Config.RESOLUTION_CACHE_TTL_HOURS * 3600)
+                ).fetchone()
+                if result:
+                    return result[0]
+        except Exception as e:
+            logger.error(f"Resolution cache get error: {e}")
+        return None
+    
+    def set(self, fingerprint: str, doi: str):
+        """Сохранение найденного DOI"""
+        try:
+            with self._connect() as conn:
                 conn.execute(
-                    'DELETE FROM doi_cache WHERE datetime(accessed_at) <= datetime("now", ?)',
-                    (f"-{Config.CACHE_TTL_HOURS} hours",)
+                    'INSERT OR REPLACE INTO reference_resolution (fingerprint, doi, created_epoch) VALUES (?, ?, ?)',
+                    (fingerprint, doi, int(time.time()))
                 )
         except Exception as e:
-            logger.error(f"Cache cleanup error: {e}")
+            logger.error(f"Resolution cache set error: {e}")
+    
+    def clear(self) -> bool:
+        """Удаление всех найденных DOI"""
+        try:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM reference_resolution')
+            return True
+        except Exception as e:
+            logger.error(f"Resolution cache clear error: {e}")
+            return False
+    
+    def clear_expired(self):
+        """Удаление записей старше TTL"""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'DELETE FROM reference_resolution WHERE created_epoch <= ?',
+                    (int(time.time()) - Config.RESOLUTION_CACHE_TTL_HOURS * 3600,)
+                )
+        except Exception as e:
+            logger.error(f"Resolution cache cleanup error: {e}")
+
+@st.cache_resource
+def get_resolution_cache() -> ReferenceResolutionCache:
+    return ReferenceResolutionCache()
 
-# Инициализация кэша
-doi_cache = DOICache()
+resolution_cache = get_resolution_cache()
 
 class UserPreferencesManager:
     """Менеджер пользовательских предпочтений"""
@@ -1067,20 +2321,336 @@ def get_text(key: str) -> str:
     return TRANSLATIONS[st.session_state.current_language].get(key, key)
 
 # Базовые классы форматирования
-class JournalAbbreviation:
+class LTWAIndex:
+    """Индекс сокращений LTWA: точные слова, основы и части сложных слов.
+    
+    Каждая запись несет множество языков из столбца LANGUAGES (записи без
+    языка считаются многоязычными). Поиск с заданным языком рассматривает
+    только записи этого языка и многоязычные, без языка - все записи.
+    """
+    
+    MIN_COMPOUND_HEAD = 4
+    # Метка записей, общих для всех языков (и записей без языка)
+    MULTILINGUAL = 'Multiple Languages'
+    
     def __init__(self):
-        self.ltwa_data = {}
-        self.load_ltwa_data()
+        self.exact: Dict[str, Optional[str]] = {}
+        # Ключи без диакритики и регистра (см. fold) -> (сокращение, языки)
+        # первой по порядку записи; если к ключу приводятся несколько
+        # записей, все они по порядку лежат в folded_variants
+        self.folded: Dict[str, Tuple[Optional[str], FrozenSet[str]]] = {}
+        self.folded_variants: Dict[str, List[Tuple[Optional[str], FrozenSet[str]]]] = {}
+        # Основа -> (порядковый номер в ltwa.csv, сокращение, языки); записи,
+        # совпавшие по основе (обычно после fold), - в prefix_variants
+        self.prefixes: Dict[str, Tuple[int, Optional[str], FrozenSet[str]]] = {}
+        self.prefix_variants: Dict[str, List[Tuple[int, Optional[str], FrozenSet[str]]]] = {}
+        self.max_prefix_len = 0
+        # Одно множество языков на каждое значение столбца LANGUAGES
+        self.language_sets: Dict[str, FrozenSet[str]] = {}
+        # Префиксные деревья на вложенных словарях, ключ '' хранит
+        # (сокращение, языки): suffix_trie построено по перевернутым окончаниям
+        # ("-berg"), infix_trie - по частям слов с дефисами с двух сторон ("-graph-")
+        self.suffix_trie: Dict[str, Any] = {}
+        self.infix_trie: Dict[str, Any] = {}
+        # Автомат Ахо-Корасик по многословным записям ("Altes Testament"):
+        # переходы, суффиксные ссылки, номера фраз, заканчивающихся в состоянии,
+        # и сами фразы как (длина шаблона, число слов, сокращение)
+        self.phrase_goto: List[Dict[str, int]] = [{}]
+        self.phrase_fail: List[int] = [0]
+        self.phrase_output: List[List[int]] = [[]]
+        self.phrases: List[Tuple[int, int, Optional[str]]] = []
+    
+    def add(self, word: str, abbreviation: Optional[str], languages: str = ''):
+        """Добавляет запись LTWA в индекс"""
+        order = len(self.exact)
+        tags = self.language_sets.get(languages)
+        if tags is None:
+            tags = frozenset(self.parse_languages(languages) or [self.MULTILINGUAL])
+            self.language_sets[languages] = tags
+        self.exact[word] = abbreviation
+        folded_word = self.fold(word)
+        if folded_word in self.folded:
+            self.folded_variants.setdefault(folded_word, [self.folded[folded_word]]).append((abbreviation, tags))
+        else:
+            self.folded[folded_word] = (abbreviation, tags)
+        
+        if word.startswith('-'):
+            # Уточнения в скобках ("-band (book)") в тексте названий не встречаются
+            part = re.sub(r'\s*\(.*?\)', '', word).lower()
+            # Вариант без диакритики добавляется, только если длина не меняется:
+            # по длине совпадения отрезается часть исходного слова
+            folded_part = self.fold(part)
+            for key in {part, folded_part} if len(folded_part) == len(part) else {part}:
+                if key.endswith('-'):
+                    self._insert(self.infix_trie, key.strip('-'), (abbreviation, tags))
+                else:
+                    self._insert(self.suffix_trie, key.lstrip('-')[::-1], (abbreviation, tags))
+        elif word.endswith('-'):
+            stem = word[:-1]
+            entry = (order, abbreviation, tags)
+            if stem in self.prefixes:
+                self.prefix_variants.setdefault(stem, [self.prefixes[stem]]).append(entry)
+                order = self.prefixes[stem][0]
+            self.prefixes[stem] = (order, abbreviation, tags)
+            self.max_prefix_len = max(self.max_prefix_len, len(stem))
+            
+            folded_stem = self.fold(stem)
+            if folded_stem != stem and folded_stem in self.prefixes:
+                self.prefix_variants.setdefault(folded_stem, [self.prefixes[folded_stem]]).append(entry)
+            if folded_stem not in self.prefixes or self.prefixes[folded_stem][0] > order:
+                self.prefixes[folded_stem] = (order, abbreviation, tags)
+                self.max_prefix_len = max(self.max_prefix_len, len(folded_stem))
+    
+    @staticmethod
+    def parse_languages(languages: str) -> List[str]:
+        """Разбирает столбец LANGUAGES ("Danish,Dutch") в список языков"""
+        if not languages:
+            return []
+        # Запятая внутри названия "Greek,Modern (1453- )" языки не разделяет
+        return [language.strip() for language in re.split(r',(?!Modern \()', languages) if language.strip()]
+    
+    @classmethod
+    def language_rank(cls, tags: FrozenSet[str], language: str) -> int:
+        """Близость записи к языку названия: 0 - тот же язык, 1 - многоязычная, 2 - другой язык"""
+        if language in tags:
+            return 0
+        return 1 if cls.MULTILINGUAL in tags else 2
+    
+    @staticmethod
+    def strip_diacritics(text: str) -> str:
+        """Убирает диакритические знаки (NFKD без комбинируемых символов)"""
+        if text.isascii():
+            return text
+        decomposed = unicodedata.normalize('NFKD', text)
+        return ''.join(char for char in decomposed if not unicodedata.combining(char))
+    
+    @staticmethod
+    def fold(text: str) -> str:
+        """Приводит текст к виду без диакритики и регистра: "Bírál" -> "biral" """
+        return LTWAIndex.strip_diacritics(text).casefold()
+    
+    def build_phrase_automaton(self):
+        """Строит автомат Ахо-Корасик по многословным записям LTWA.
+        
+        Шаблоны строятся с пробелами по краям (" altes testament "), поэтому
+        совпадения всегда приходятся на границы слов. Для записей с дефисом
+        на конце ("ad valor-") завершающий пробел не ставится и последнее
+        слово может продолжаться.
+        """
+        self.phrase_goto, self.phrase_fail, self.phrase_output, self.phrases = [{}], [0], [[]], []
+        
+        for word, abbreviation in self.exact.items():
+            if ' ' not in word or word.startswith('-'):
+                continue
+            phrase = re.sub(r'\s*\(.*?\)', '', word).lower()
+            if ' ' not in phrase:
+                continue
+            pattern = f" {phrase[:-1]}" if phrase.endswith('-') else f" {phrase} "
+            
+            state = 0
+            for char in pattern:
+                if char not in self.phrase_goto[state]:
+                    self.phrase_goto.append({})
+                    self.phrase_fail.append(0)
+                    self.phrase_output.append([])
+                    self.phrase_goto[state][char] = len(self.phrase_goto) - 1
+                state = self.phrase_goto[state][char]
+            self.phrase_output[state].append(len(self.phrases))
+            self.phrases.append((len(pattern), len(phrase.split()), abbreviation))
+        
+        # Суффиксные ссылки обходом в ширину
+        queue = list(self.phrase_goto[0].values())
+        for state in queue:
+            for char, next_state in self.phrase_goto[state].items():
+                fallback = self.phrase_fail[state]
+                while fallback and char not in self.phrase_goto[fallback]:
+                    fallback = self.phrase_fail[fallback]
+                target = self.phrase_goto[fallback].get(char, 0)
+                self.phrase_fail[next_state] = target if target != next_state else 0
+                self.phrase_output[next_state] += self.phrase_output[self.phrase_fail[next_state]]
+                queue.append(next_state)
+    
+    def find_phrases(self, words: List[str]) -> List[Tuple[int, int, Optional[str]]]:
+        """Находит многословные записи LTWA за один проход по названию.
+        
+        Принимает слова в нижнем регистре и возвращает непересекающиеся
+        совпадения (индекс первого слова, число слов, сокращение), выбирая
+        самое левое и затем самое длинное.
+        """
+        if not self.phrases:
+            return []
+        
+        text = ' ' + ' '.join(words) + ' '
+        # Позиция пробела перед словом -> индекс слова
+        word_at = {}
+        position = 0
+        for i, word in enumerate(words):
+            word_at[position] = i
+            position += len(word) + 1
+        
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self.phrase_goto[state]:
+                state = self.phrase_fail[state]
+            state = self.phrase_goto[state].get(char, 0)
+            for phrase_id in self.phrase_output[state]:
+                length, word_count, abbreviation = self.phrases[phrase_id]
+                start = word_at.get(position - length + 1)
+                if start is not None:
+                    matches.append((start, word_count, abbreviation))
+        
+        matches.sort(key=lambda match: (match[0], -match[1]))
+        selected = []
+        next_free = 0
+        for match in matches:
+            if match[0] >= next_free:
+                selected.append(match)
+                next_free = match[0] + match[1]
+        return selected
+    
+    @staticmethod
+    def _insert(trie: Dict[str, Any], key: str, value: Tuple[Optional[str], FrozenSet[str]]):
+        """Вставляет ключ со значением (сокращение, языки) в префиксное дерево"""
+        if not key:
+            return
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[''] = value
+    
+    def lookup_folded(self, key: str, language: Optional[str] = None) -> Optional[Tuple[Optional[str], FrozenSet[str]]]:
+        """Запись по ключу без диакритики и регистра.
+        
+        Из нескольких записей с одним ключом берется первая по порядку
+        записей языка, затем многоязычных, затем всех.
+        """
+        entry = self.folded.get(key)
+        if entry is None or language is None or key not in self.folded_variants:
+            return entry
+        return min(self.folded_variants[key], key=lambda variant: self.language_rank(variant[1], language))
+    
+    def lookup_prefix(self, word: str, language: Optional[str] = None) -> Optional[Tuple[int, Optional[str]]]:
+        """Ищет основу, с которой начинается слово, за O(длина слова) обращений к словарю.
+        
+        Из всех подходящих основ выбирается первая по порядку в ltwa.csv,
+        что совпадает с прежним линейным перебором словаря. Если задан язык,
+        рассматриваются только основы этого языка и многоязычные.
+        """
+        best = None
+        for end in range(1, min(len(word), self.max_prefix_len) + 1):
+            stem = word[:end]
+            entry = self.prefixes.get(stem)
+            if entry is None:
+                continue
+            if language is None:
+                candidates = (entry,)
+            else:
+                candidates = [variant for variant in self.prefix_variants.get(stem, (entry,))
+                              if self.language_rank(variant[2], language) <= 1]
+            for candidate in candidates:
+                if best is None or candidate[0] < best[0]:
+                    best = candidate
+        return (best[0], best[1]) if best else None
+    
+    def lookup_suffix(self, word: str, language: Optional[str] = None) -> Optional[Tuple[int, Optional[str]]]:
+        """Ищет самое длинное окончание сложного слова одним проходом по перевернутому слову.
+        
+        Возвращает (длина окончания, сокращение). Перед окончанием должно
+        оставаться хотя бы MIN_COMPOUND_HEAD символов, чтобы короткие имена
+        собственные ("Dalton" и "-ton") не считались сложными словами. Если
+        задан язык, рассматриваются только окончания этого языка и многоязычные.
+        """
+        node = self.suffix_trie
+        best = None
+        for length, char in enumerate(reversed(word[self.MIN_COMPOUND_HEAD:]), 1):
+            node = node.get(char)
+            if node is None:
+                break
+            if '' in node:
+                abbreviation, tags = node['']
+                if language is None or self.language_rank(tags, language) <= 1:
+                    best = (length, abbreviation)
+        return best
+    
+    def lookup_infix(self, word: str, language: Optional[str] = None) -> Optional[Tuple[int, Optional[str]]]:
+        """Ищет часть сложного слова ("-graph-") не в начале слова.
+        
+        Возвращает (позиция начала, сокращение) для самого левого и
+        затем самого длинного совпадения. Если задан язык, рассматриваются
+        только части этого языка и многоязычные, и при одинаковом начале
+        часть языка названия предпочитается многоязычной.
+        """
+        if not self.infix_trie:
+            return None
+        for start in range(1, len(word)):
+            node = self.infix_trie
+            # Самое длинное совпадение для языка названия и для многоязычных записей
+            by_rank: List[Optional[Tuple[int, Optional[str]]]] = [None, None]
+            for char in word[start:]:
+                node = node.get(char)
+                if node is None:
+                    break
+                if '' in node:
+                    abbreviation, tags = node['']
+                    rank = 0 if language is None else self.language_rank(tags, language)
+                    if rank <= 1:
+                        by_rank[rank] = (start, abbreviation)
+            if by_rank[0] or by_rank[1]:
+                return by_rank[0] or by_rank[1]
+        return None
+
+class JournalAbbreviation:
+    # Формат снимка: сигнатура, версия формата, версия marshal и Python,
+    # затем marshal-данные индексов
+    SNAPSHOT_MAGIC = b'LTWA'
+    SNAPSHOT_VERSION = 4
+    # Увеличивается при изменении правил сокращения: сохраненные результаты
+    # прежних версий в JournalAbbreviationStore перестают использоваться
+    ABBREVIATION_VERSION = 2
+    
+    # Характерные служебные слова названий журналов для определения языка
+    LANGUAGE_MARKERS = {
+        'English': {'journal', 'of', 'the', 'and', 'for', 'letters', 'proceedings', 'transactions', 'review', 'society'},
+        'German': {'für', 'und', 'der', 'die', 'zeitschrift', 'berichte', 'jahrbuch', 'mitteilungen'},
+        'French': {'et', 'du', 'des', 'revue', 'société', 'annales', 'cahiers'},
+        'Spanish': {'y', 'del', 'los', 'las', 'revista', 'sociedad', 'española'},
+        'Italian': {'di', 'della', 'delle', 'rivista', 'giornale', 'italiana'},
+        'Dutch': {'van', 'voor', 'het', 'tijdschrift', 'nederlands'},
+        'Swedish': {'och', 'för', 'tidskrift', 'svensk'},
+        'Danish': {'og', 'tidsskrift', 'dansk'},
+        'Portuguese': {'da', 'do', 'dos', 'brasileira', 'portuguesa'},
+        'Polish': {'przegląd', 'polski', 'polska', 'w'},
+        'Finnish': {'ja', 'suomen', 'aikakauskirja'},
+    }
+    
+    def __init__(self, use_snapshot: bool = True, store: Optional[JournalAbbreviationStore] = None):
+        self.index = LTWAIndex()
+        self.ltwa_data = self.index.exact
+        # Готовые сокращения по (название, стиль, язык)
+        self.memo = LRUCache(Config.JOURNAL_ABBREVIATION_CACHE_SIZE)
+        self.store = store
+        self.source_signature = None
+        self.load_ltwa_data(use_snapshot)
         self.uppercase_abbreviations = {'acs', 'ecs', 'rsc', 'ieee', 'iet', 'acm', 'aims', 'bmc', 'bmj', 'npj'}
         self.special_endings = {'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 
                                'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z',
                                'I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII', 'IX', 'X'}
+        self.special_ending_pattern = self._compile_special_ending_pattern()
     
-    def load_ltwa_data(self):
-        """Загружает данные сокращений из файла ltwa.csv"""
+    def load_ltwa_data(self, use_snapshot: bool = True):
+        """Загружает данные сокращений из снимка или из файла ltwa.csv.
+        
+        Если снимка нет или он не подходит, индексы строятся из ltwa.csv и
+        снимок пересобирается, чтобы следующие процессы его использовали.
+        """
         try:
+            if use_snapshot and self.load_snapshot(Config.LTWA_SNAPSHOT_PATH):
+                return
+            
             csv_path = Config.LTWA_CSV_PATH
             if os.path.exists(csv_path):
+                self.source_signature = self._source_signature()
                 with open(csv_path, 'r', encoding='utf-8') as f:
                     reader = csv.reader(f, delimiter='\t')
                     next(reader)
@@ -1088,66 +2658,331 @@ class JournalAbbreviation:
                         if len(row) >= 2:
                             word = row[0].strip()
                             abbreviation = row[1].strip() if row[1].strip() else None
-                            self.ltwa_data[word] = abbreviation
+                            languages = row[2].strip() if len(row) > 2 else ''
+                            self.index.add(word, abbreviation, languages)
+                self.index.build_phrase_automaton()
+                if use_snapshot:
+                    try:
+                        self.save_snapshot(Config.LTWA_SNAPSHOT_PATH)
+                        logger.info(f"Снимок {Config.LTWA_SNAPSHOT_PATH} пересобран из {csv_path}")
+                    except OSError as e:
+                        logger.warning(f"Не удалось сохранить снимок {Config.LTWA_SNAPSHOT_PATH}: {e}")
             else:
                 logger.warning(f"Файл {csv_path} не найден, используется стандартное сокращение")
         except Exception as e:
             logger.error(f"Ошибка загрузки ltwa.csv: {e}")
     
-    def abbreviate_word(self, word: str) -> str:
-        """Сокращает одно слово на основе данных LTWA"""
+    def _source_signature(self) -> Optional[str]:
+        """SHA-256 содержимого ltwa.csv для проверки актуальности снимка и сохраненных сокращений.
+        
+        Время изменения не используется: оно разное у каждой копии репозитория,
+        и новый checkout или деплой сбрасывал бы все сохраненные сокращения.
+        """
+        if not os.path.exists(Config.LTWA_CSV_PATH):
+            return None
+        digest = hashlib.sha256()
+        with open(Config.LTWA_CSV_PATH, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    @classmethod
+    def _snapshot_header(cls) -> bytes:
+        """Заголовок снимка: формат marshal зависит от версии Python"""
+        return cls.SNAPSHOT_MAGIC + bytes([cls.SNAPSHOT_VERSION, marshal.version,
+                                           sys.version_info.major, sys.version_info.minor])
+    
+    def save_snapshot(self, snapshot_path: str = Config.LTWA_SNAPSHOT_PATH):
+        """Сохраняет построенные индексы LTWA в бинарный снимок"""
+        payload = {
+            'source': self._source_signature(),
+            'index': vars(self.index)
+        }
+        # Свой временный файл у каждого процесса: несколько воркеров могут собирать снимок одновременно
+        tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(self._snapshot_header())
+                marshal.dump(payload, f)
+            os.replace(tmp_path, snapshot_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def load_snapshot(self, snapshot_path: str) -> bool:
+        """Загружает индексы из снимка.
+        
+        Снимок - только кэш запуска: он избавляет от разбора CSV и построения
+        индексов, но память не экономит, каждый процесс держит собственную
+        копию словарей. Снимок другой версии, другой версии Python,
+        поврежденный или устаревший (ltwa.csv изменился после сборки)
+        игнорируется.
+        """
+        if not os.path.exists(snapshot_path):
+            return False
+        
+        header = self._snapshot_header()
+        try:
+            with open(snapshot_path, 'rb') as f:
+                data = f.read()
+            if data[:len(header)] != header:
+                logger.warning(f"Снимок {snapshot_path} имеет другую версию, используется ltwa.csv")
+                return False
+            payload = marshal.loads(data[len(header):])
+            
+            source = payload['source']
+            current_source = self._source_signature()
+            if current_source is not None and source != current_source:
+                logger.warning(f"Снимок {snapshot_path} устарел, используется ltwa.csv")
+                return False
+            
+            index = LTWAIndex()
+            vars(index).update(payload['index'])
+        except Exception as e:
+            logger.warning(f"Снимок {snapshot_path} не читается ({e}), используется ltwa.csv")
+            return False
+        
+        self.index = index
+        self.ltwa_data = self.index.exact
+        self.source_signature = source
+        logger.info(f"Данные LTWA загружены из снимка {snapshot_path}")
+        return True
+    
+    def detect_language(self, journal_name: str) -> Optional[str]:
+        """Определяет язык названия по характерным служебным словам.
+        
+        Возвращает None, если язык не удалось однозначно определить.
+        """
+        words = set(journal_name.lower().replace(':', ' ').split())
+        scores = {language: len(words & markers) for language, markers in self.LANGUAGE_MARKERS.items()}
+        best = max(scores.values())
+        if best == 0:
+            return None
+        candidates = [language for language, score in scores.items() if score == best]
+        return candidates[0] if len(candidates) == 1 else None
+    
+    def abbreviate_word(self, word: str, language: Optional[str] = None) -> str:
+        """Сокращает одно слово на основе данных LTWA (с учетом языка, если он задан).
+        
+        На каждом шаге (точное слово, основа, окончание, часть слова) сначала
+        проверяются записи языка названия и многоязычные, и только при
+        неудаче - все записи общего индекса.
+        """
+        index = self.index
         word_lower = word.lower()
         
-        if word_lower in self.ltwa_data:
-            abbr = self.ltwa_data[word_lower]
+        if word_lower in index.exact:
+            abbr = index.exact[word_lower]
             return abbr if abbr else word
         
-        for ltwa_word, abbr in self.ltwa_data.items():
-            if ltwa_word.endswith('-') and word_lower.startswith(ltwa_word[:-1]):
-                return abbr if abbr else word
+        # Названия из Crossref часто приходят без диакритики или в разложенной
+        # форме: сравниваем ключи, приведенные к единому виду
+        word_folded = LTWAIndex.fold(word)
+        entry = index.lookup_folded(word_folded, language)
+        if entry is not None:
+            return self._follow_spelling(entry[0], word)
+        
+        # На каждом шаге приведенная форма проверяется, только если исходная
+        # ничего не нашла. Для окончаний и частей слов позиции совпадения
+        # переносятся на исходное слово, поэтому нужна та же длина
+        variants = [word_lower]
+        if word_folded != word_lower:
+            variants.append(word_folded)
+        affix_variants = [variant for variant in variants if len(variant) == len(word)]
+        
+        # Сначала ищутся записи языка названия и многоязычные, затем любые
+        passes = [language, None] if language else [None]
+        
+        for pass_language in passes:
+            for variant in variants:
+                match = index.lookup_prefix(variant, pass_language)
+                if match:
+                    return self._follow_spelling(match[1], word)
+        
+        # Окончания сложных слов: "-berg" -> "-b." дает "Heidelberg" -> "Heidelb."
+        for pass_language in passes:
+            for variant in affix_variants:
+                match = index.lookup_suffix(variant, pass_language)
+                if match:
+                    length, abbr = match
+                    return word[:-length] + self._follow_spelling(abbr, word).lstrip('-') if abbr else word
+        
+        # Части слов: "-graph-" -> "-gr." дает "Geographical" -> "Geogr."
+        for pass_language in passes:
+            for variant in affix_variants:
+                match = index.lookup_infix(variant, pass_language)
+                if match:
+                    start, abbr = match
+                    return word[:start] + self._follow_spelling(abbr, word).lstrip('-') if abbr else word
         
         return word
     
+    @staticmethod
+    def _follow_spelling(abbreviation: Optional[str], word: str) -> str:
+        """Возвращает сокращение (или слово, если сокращения нет).
+        
+        Если в слове нет диакритики, она убирается и из сокращения:
+        "Electrochimica" не должно превращаться в "Électrochim.".
+        """
+        if not abbreviation:
+            return word
+        if LTWAIndex.strip_diacritics(word) == word:
+            return LTWAIndex.strip_diacritics(abbreviation)
+        return abbreviation
+    
+    def _compile_special_ending_pattern(self) -> re.Pattern:
+        """Собирает одно регулярное выражение для всех специальных окончаний.
+        
+        Выражение привязано к началу строки, поэтому варианты проверяются
+        по порядку за один проход: сначала окончание в конце названия, затем
+        буква с двоеточием. Окончания "Part A" и "Part II" отдельно не
+        проверяются - их находит первый вариант по последнему слову.
+        """
+        endings = sorted(self.special_endings | set(string.ascii_uppercase), key=len, reverse=True)
+        return re.compile(
+            r'^(?:'
+            # Одиночные буквы и римские цифры в конце: Chemistry A, Annales II
+            r'(?P<base>.*)\s+(?P<ending>' + '|'.join(endings) + r')\s*$'
+            # Буква с двоеточием: A: General, B: Environmental
+            r'|(?P<section_base>.*?)\s+(?P<section>[A-Z]):\s+[A-Z]'
+            r')',
+            re.DOTALL
+        )
+    
     def extract_special_endings(self, journal_name: str) -> Tuple[str, str]:
         """Извлекает специальные окончания (A, B, C и т.д.) из названия журнала"""
-        # Паттерны для поиска специальных окончаний
-        patterns = [
-            r'\s+([A-Z])\s*$',  # Одиночные буквы в конце
-            r'\s+([IVX]+)\s*$',  # Римские цифры
-            r'\s+Part\s+([A-Z0-9]+)\s*$',  # Part A, Part 1 и т.д.
-            r'\s+([A-Z]):\s+[A-Z]',  # Буква с двоеточием: A: General, B: Environmental
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, journal_name)
-            if match:
-                ending = match.group(1)
-                # Проверяем, является ли окончание специальным
-                if ending in self.special_endings or re.match(r'^[A-Z]$', ending):
-                    base_name = journal_name[:match.start()].strip()
-                    return base_name, ending
-        
-        return journal_name, ""
-    
-    def abbreviate_journal_name(self, journal_name: str, style: str = "{J. Abbr.}") -> str:
-        """Сокращает название журнала в соответствии с выбранным стилем"""
+        match = self.special_ending_pattern.match(journal_name)
+        if not match:
+            return journal_name, ""
+        if match.group('ending'):
+            return match.group('base').strip(), match.group('ending')
+        return match.group('section_base').strip(), match.group('section')
+    
+    def abbreviate_journal_name(self, journal_name: str, style: str = "{J. Abbr.}",
+                                language: Optional[str] = None) -> str:
+        """Сокращает название журнала в соответствии с выбранным стилем.
+        
+        Если язык не указан, он определяется по названию; при неудаче поиск
+        идет по всему словарю LTWA. Результаты запоминаются в self.memo.
+        """
         if not journal_name:
             return ""
         
+        key = (journal_name, style, language)
+        result = self.memo.get(key)
+        if result is not None:
+            return result
+        
+        # Постоянное хранилище используется только для автоопределения языка
+        use_store = self.store is not None and language is None
+        if use_store:
+            result = self.store.get(journal_name, style, self.data_version)
+        if result is None:
+            result = self._abbreviate_journal_name(journal_name, style, language)
+            if use_store:
+                self.store.set(journal_name, style, self.data_version, result)
+        
+        self.memo.set(key, result)
+        return result
+    
+    def abbreviate_many(self, journal_names: List[str], style: str = "{J. Abbr.}",
+                        language: Optional[str] = None) -> List[str]:
+        """Сокращает названия журналов всего списка литературы.
+        
+        Каждое уникальное название обрабатывается один раз: сначала кэш в
+        памяти, затем одним запросом хранилище, затем индексы LTWA; новые
+        результаты сохраняются одной транзакцией. Порядок результатов
+        совпадает с порядком входного списка.
+        """
+        results = {}
+        missing = []
+        for journal_name in dict.fromkeys(journal_names):
+            if not journal_name:
+                results[journal_name] = ""
+                continue
+            cached = self.memo.get((journal_name, style, language))
+            if cached is None:
+                missing.append(journal_name)
+            else:
+                results[journal_name] = cached
+        
+        use_store = self.store is not None and language is None
+        if missing and use_store:
+            stored = self.store.get_many(missing, style, self.data_version)
+            for journal_name, abbreviation in stored.items():
+                results[journal_name] = abbreviation
+                self.memo.set((journal_name, style, language), abbreviation)
+            missing = [journal_name for journal_name in missing if journal_name not in stored]
+        
+        computed = []
+        for journal_name in missing:
+            abbreviation = self._abbreviate_journal_name(journal_name, style, language)
+            results[journal_name] = abbreviation
+            self.memo.set((journal_name, style, language), abbreviation)
+            computed.append((journal_name, style, abbreviation))
+        if computed and use_store:
+            self.store.set_many(computed, self.data_version)
+        
+        return [results[journal_name] for journal_name in journal_names]
+    
+    @property
+    def data_version(self) -> str:
+        """Версия правил и данных LTWA для сохраненных сокращений"""
+        return f"{self.ABBREVIATION_VERSION}:{self.source_signature or ''}"
+    
+    def precompute(self, journal_names: Set[str], styles: List[str] = Config.JOURNAL_STYLES) -> int:
+        """Сокращает названия во всех стилях и сохраняет их в хранилище одной транзакцией"""
+        items = []
+        for journal_name in journal_names:
+            for style in styles:
+                result = self._abbreviate_journal_name(journal_name, style, None)
+                self.memo.set((journal_name, style, None), result)
+                items.append((journal_name, style, result))
+        if self.store is not None:
+            self.store.set_many(items, self.data_version)
+        return len(items)
+    
+    def _abbreviate_journal_name(self, journal_name: str, style: str, language: Optional[str]) -> str:
+        """Сокращает название журнала без обращения к кэшу"""
         # Извлекаем базовое название и специальное окончание
         base_name, special_ending = self.extract_special_endings(journal_name)
         
+        if language is None:
+            language = self.detect_language(base_name)
+        
         words_to_remove = {'a', 'an', 'the', 'of', 'in', 'and', '&', 'for', 'on', 'with', 'by'}
-        words = [word for word in base_name.split() if word.lower() not in words_to_remove]
-        words = [word.replace(':', '') for word in words]
+        tokens = base_name.split()
+        phrase_matches = {
+            start: (word_count, abbreviation)
+            for start, word_count, abbreviation
+            in self.index.find_phrases([token.replace(':', '').lower() for token in tokens])
+        }
+        
+        # Слова названия как (слово, сокращение многословной записи или None)
+        words = []
+        i = 0
+        while i < len(tokens):
+            if i in phrase_matches:
+                word_count, abbreviation = phrase_matches[i]
+                phrase = " ".join(token.replace(':', '') for token in tokens[i:i + word_count])
+                words.append((phrase, abbreviation or phrase))
+                i += word_count
+                continue
+            if tokens[i].lower() not in words_to_remove:
+                words.append((tokens[i].replace(':', ''), None))
+            i += 1
         
         if len(words) <= 1:
             result = journal_name
         else:
             abbreviated_words = []
-            for i, word in enumerate(words):
+            for i, (word, phrase_abbreviation) in enumerate(words):
+                if phrase_abbreviation is not None:
+                    abbreviated_words.append(phrase_abbreviation)
+                    continue
+                
                 original_first_char = word[0]
-                abbreviated = self.abbreviate_word(word.lower())
+                abbreviated = self.abbreviate_word(word.lower(), language)
                 
                 if abbreviated and original_first_char.isupper():
                     abbreviated = abbreviated[0].upper() + abbreviated[1:]
@@ -1179,14 +3014,20 @@ class JournalAbbreviation:
         result = re.sub(r'\.\.+', '.', result)
         return result
 
-# Инициализация системы сокращений
-journal_abbrev = JournalAbbreviation()
+# Инициализация системы сокращений (один экземпляр на процесс для всех сессий)
+@st.cache_resource
+def get_journal_abbreviation() -> JournalAbbreviation:
+    return JournalAbbreviation(store=JournalAbbreviationStore())
+
+journal_abbrev = get_journal_abbreviation()
 
 class BaseCitationFormatter:
     """Базовый класс для форматирования цитирования"""
     
     def __init__(self, style_config: Dict[str, Any]):
         self.style_config = style_config
+        # Названия журналов, сокращенные заранее для всего пакета
+        self.journal_names: Dict[str, str] = {}
     
     def format_authors(self, authors: List[Dict[str, str]]) -> str:
         """Форматирует список авторов"""
@@ -1318,8 +3159,16 @@ class BaseCitationFormatter:
         
         return value, f"https://doi.org/{doi}"
     
+    def prepare_journal_names(self, journal_names: List[str]):
+        """Сокращает названия журналов пакета одним вызовом до форматирования ссылок"""
+        journal_style = self.style_config.get('journal_style', '{Full Journal Name}')
+        unique_names = list(dict.fromkeys(name for name in journal_names if name))
+        self.journal_names = dict(zip(unique_names, journal_abbrev.abbreviate_many(unique_names, journal_style)))
+    
     def format_journal_name(self, journal_name: str) -> str:
         """Форматирует название журнала с учетом выбранного стиля"""
+        if journal_name in self.journal_names:
+            return self.journal_names[journal_name]
         journal_style = self.style_config.get('journal_style', '{Full Journal Name}')
         return journal_abbrev.abbreviate_journal_name(journal_name, journal_style)
 
@@ -1909,8 +3758,32 @@ class DocumentGenerator:
 class DOIProcessor:
     """Процессор для работы с DOI"""
     
+    # Заголовки разделов списка литературы, одно выражение вместо перебора шаблонов
+    SECTION_HEADER_PATTERN = re.compile(
+        r'^(?:'
+        r'NOTES?\s+AND\s+REFERENCES?'
+        r'|REFERENCES?'
+        r'|BIBLIOGRAPHY'
+        r'|LITERATURE'
+        r'|WORKS?\s+CITED'
+        r'|SOURCES?'
+        r'|CHAPTER\s+\d+'
+        r'|SECTION\s+\d+'
+        r'|PART\s+\d+'
+        r')$'
+    )
+    
+    # Версия derive_metadata: при изменении извлечения полей увеличить,
+    # и записи кэша будут заново извлечены из сохраненных ответов Crossref
+    EXTRACTOR_VERSION = 1
+    
+    # Синтаксис DOI: префикс 10.NNNN и непустой суффикс
+    DOI_SYNTAX_PATTERN = re.compile(r'^10\.\d{4,9}/\S+$')
+    
     def __init__(self):
         self.cache = doi_cache
+        self.negative_cache = negative_cache
+        self.resolution_cache = resolution_cache
         self.works = works
     
     def find_doi_enhanced(self, reference: str) -> Optional[str]:
@@ -1924,10 +3797,17 @@ class DOIProcessor:
             logger.info(f"Found explicit DOI: {explicit_doi}")
             return explicit_doi
         
-        # Стратегия 2: Поиск по библиографическим данным в Crossref
-        bibliographic_doi = self._find_bibliographic_doi(reference)
+        # Стратегия 2: Поиск по библиографическим данным в Crossref (результат кэшируется)
+        fingerprint = self.resolution_cache.fingerprint(reference)
+        cached_doi = self.resolution_cache.get(fingerprint)
+        if cached_doi:
+            logger.info(f"Found cached bibliographic DOI: {cached_doi}")
+            return cached_doi
+        
+        bibliographic_doi = self._find_bibliographic_doi(reference, fingerprint)
         if bibliographic_doi:
             logger.info(f"Found bibliographic DOI: {bibliographic_doi}")
+            self.resolution_cache.set(fingerprint, bibliographic_doi)
             return bibliographic_doi
         
         # Стратегия 3: Поиск через OpenAlex (если подключен)
@@ -1941,23 +3821,7 @@ class DOIProcessor:
     
     def _is_section_header(self, text: str) -> bool:
         """Определяет, является ли текст заголовком раздела"""
-        text_upper = text.upper().strip()
-        section_patterns = [
-            r'^NOTES?\s+AND\s+REFERENCES?$',
-            r'^REFERENCES?$',
-            r'^BIBLIOGRAPHY$',
-            r'^LITERATURE$',
-            r'^WORKS?\s+CITED$',
-            r'^SOURCES?$',
-            r'^CHAPTER\s+\d+$',
-            r'^SECTION\s+\d+$',
-            r'^PART\s+\d+$'
-        ]
-        
-        for pattern in section_patterns:
-            if re.search(pattern, text_upper):
-                return True
-        return False
+        return self.SECTION_HEADER_PATTERN.search(text.upper().strip()) is not None
     
     def _find_explicit_doi(self, reference: str) -> Optional[str]:
         """Поиск явного DOI в тексте"""
@@ -1982,21 +3846,30 @@ class DOIProcessor:
         
         return None
     
-    def _find_bibliographic_doi(self, reference: str) -> Optional[str]:
+    def _find_bibliographic_doi(self, reference: str, fingerprint: Optional[str] = None) -> Optional[str]:
         """Поиск DOI по библиографическим данным"""
+        if fingerprint is None:
+            fingerprint = self.resolution_cache.fingerprint(reference)
         clean_ref = re.sub(r'\s*(https?://doi\.org/|doi:|DOI:)\s*[^\s,;]+', '', reference, flags=re.IGNORECASE)
         clean_ref = clean_ref.strip()
         
         if len(clean_ref) < 30:
             return None
         
+        if self.negative_cache.get('reference', fingerprint):
+            logger.info(f"Skipping bibliographic search with a recent empty result: '{clean_ref[:100]}'")
+            return None
+        
         try:
             query = self.works.query(bibliographic=clean_ref).sort('relevance').order('desc')
             for result in query:
                 if 'DOI' in result:
                     return result['DOI']
+            self.negative_cache.set('reference', fingerprint, NegativeCache.NOT_FOUND)
         except Exception as e:
             logger.error(f"Bibliographic search error for '{clean_ref}': {e}")
+            if isinstance(e, requests.exceptions.RequestException):
+                self.negative_cache.set('reference', fingerprint, NegativeCache.TIMEOUT)
         
         return None
     
@@ -2009,75 +3882,99 @@ class DOIProcessor:
     def extract_metadata_with_cache(self, doi: str) -> Optional[Dict]:
         """Извлечение метаданных с использованием кэша"""
         # Проверка кэша
-        cached_metadata = self.cache.get(doi)
+        cached_metadata, is_stale = self.cache.lookup(doi)
         if cached_metadata:
-            logger.info(f"Cache hit for DOI: {doi}")
+            logger.info(f"Cache hit for DOI: {doi}{' (stale, refreshing)' if is_stale else ''}")
+            if is_stale:
+                get_cache_refresher().schedule([doi])
             return cached_metadata
         
+        reason = self.negative_cache.get('doi', doi)
+        if reason:
+            logger.info(f"Skipping DOI {doi}: recent failure ({reason})")
+            return None
+        
         # Извлечение из API
         logger.info(f"Cache miss for DOI: {doi}, fetching from API")
-        metadata = self._extract_metadata_from_api(doi)
+        metadata, raw = self.fetch_metadata(doi)
         
         if metadata:
-            self.cache.set(doi, metadata)
+            self.cache.set(doi, metadata, raw)
         
         return metadata
     
     def _extract_metadata_from_api(self, doi: str) -> Optional[Dict]:
         """Извлечение метаданных из Crossref API"""
+        return self.fetch_metadata(doi)[0]
+    
+    def fetch_metadata(self, doi: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """Запрос записи Crossref; возвращает метаданные и исходную запись для кэша.
+        
+        Неудача запоминается в отрицательном кэше.
+        """
+        if not self.DOI_SYNTAX_PATTERN.match(doi):
+            self.negative_cache.set('doi', doi, NegativeCache.MALFORMED)
+            return None, None
         try:
             result = self.works.doi(doi)
             if not result:
-                return None
-            
-            authors = result.get('author', [])
-            author_list = []
-            for author in authors:
-                given_name = author.get('given', '')
-                family_name = self._normalize_name(author.get('family', ''))
-                author_list.append({
-                    'given': given_name,
-                    'family': family_name
-                })
-            
-            title = ''
-            if 'title' in result and result['title']:
-                title = self._clean_text(result['title'][0])
-                title = re.sub(r'</?sub>|</?i>|</?SUB>|</?I>', '', title, flags=re.IGNORECASE)
-            
-            journal = ''
-            if 'container-title' in result and result['container-title']:
-                journal = self._clean_text(result['container-title'][0])
-            
-            year = None
-            if 'published' in result and 'date-parts' in result['published']:
-                date_parts = result['published']['date-parts']
-                if date_parts and date_parts[0]:
-                    year = date_parts[0][0]
-            
-            volume = result.get('volume', '')
-            issue = result.get('issue', '')
-            pages = result.get('page', '')
-            article_number = result.get('article-number', '')
-            
-            metadata = {
-                'authors': author_list,
-                'title': title,
-                'journal': journal,
-                'year': year,
-                'volume': volume,
-                'issue': issue,
-                'pages': pages,
-                'article_number': article_number,
-                'doi': doi,
-                'original_doi': doi
-            }
-            
-            return metadata
-            
+                self.negative_cache.set('doi', doi, NegativeCache.NOT_FOUND)
+                return None, None
+            return self.derive_metadata(result, doi), result
         except Exception as e:
             logger.error(f"Error extracting metadata for DOI {doi}: {e}")
-            return None
+            if isinstance(e, requests.exceptions.RequestException):
+                self.negative_cache.set('doi', doi, NegativeCache.TIMEOUT)
+            else:
+                self.negative_cache.set('doi', doi, NegativeCache.MALFORMED)
+            return None, None
+    
+    def derive_metadata(self, result: Dict, doi: str) -> Dict:
+        """Извлечение полей из записи Crossref (без сети; версия - EXTRACTOR_VERSION)"""
+        authors = result.get('author', [])
+        author_list = []
+        for author in authors:
+            given_name = author.get('given', '')
+            family_name = self._normalize_name(author.get('family', ''))
+            author_list.append({
+                'given': given_name,
+                'family': family_name
+            })
+        
+        title = ''
+        if 'title' in result and result['title']:
+            title = self._clean_text(result['title'][0])
+            title = re.sub(r'</?sub>|</?i>|</?SUB>|</?I>', '', title, flags=re.IGNORECASE)
+        
+        journal = ''
+        if 'container-title' in result and result['container-title']:
+            journal = self._clean_text(result['container-title'][0])
+        
+        year = None
+        if 'published' in result and 'date-parts' in result['published']:
+            date_parts = result['published']['date-parts']
+            if date_parts and date_parts[0]:
+                year = date_parts[0][0]
+        
+        volume = result.get('volume', '')
+        issue = result.get('issue', '')
+        pages = result.get('page', '')
+        article_number = result.get('article-number', '')
+        
+        metadata = {
+            'authors': author_list,
+            'title': title,
+            'journal': journal,
+            'year': year,
+            'volume': volume,
+            'issue': issue,
+            'pages': pages,
+            'article_number': article_number,
+            'doi': doi,
+            'original_doi': doi
+        }
+        
+        return metadata
     
     def _normalize_name(self, name: str) -> str:
         """Нормализует имя автора"""
@@ -2112,6 +4009,75 @@ class DOIProcessor:
         text = re.sub(r'&[^;]+;', '', text)
         return text.strip()
 
+class CacheRefresher:
+    """Фоновое обновление устаревших записей кэша DOI с ограниченной параллельностью.
+    
+    Один DOI обновляется не более чем одним заданием одновременно; сверх
+    CACHE_REFRESH_MAX_PENDING заданий новые не ставятся (запись будет
+    снова предложена к обновлению при следующем обращении).
+    """
+    
+    def __init__(self, cache: DOICache, negative: NegativeCache, fetch):
+        self.cache = cache
+        self.negative_cache = negative
+        self.fetch = fetch
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=Config.CACHE_REFRESH_WORKERS, thread_name_prefix="doi-cache-refresh"
+        )
+        self._in_flight: Set[str] = set()
+        self._lock = threading.Lock()
+        self.refreshed = 0
+        self.failed = 0
+        self.dropped = 0
+    
+    def schedule(self, dois) -> int:
+        """Ставит DOI в очередь обновления; возвращает число новых заданий"""
+        scheduled = 0
+        with self._lock:
+            for doi in dois:
+                if doi in self._in_flight:
+                    continue
+                if len(self._in_flight) >= Config.CACHE_REFRESH_MAX_PENDING:
+                    self.dropped += 1
+                    continue
+                self._in_flight.add(doi)
+                self._executor.submit(self._refresh, doi)
+                scheduled += 1
+        return scheduled
+    
+    def _refresh(self, doi: str):
+        """Повторно получает метаданные; при неудаче устаревшая запись остается в кэше"""
+        try:
+            if self.negative_cache.get('doi', doi):
+                return
+            metadata, raw = self.fetch(doi)
+            with self._lock:
+                if metadata:
+                    self.refreshed += 1
+                else:
+                    self.failed += 1
+            if metadata:
+                self.cache.set(doi, metadata, raw)
+        except Exception as e:
+            logger.error(f"Background refresh error for DOI {doi}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(doi)
+    
+    def stats(self) -> Dict[str, int]:
+        """Счетчики фонового обновления"""
+        with self._lock:
+            return {
+                'in_flight': len(self._in_flight),
+                'refreshed': self.refreshed,
+                'failed': self.failed,
+                'dropped': self.dropped
+            }
+
+@st.cache_resource
+def get_cache_refresher() -> CacheRefresher:
+    return CacheRefresher(doi_cache, negative_cache, DOIProcessor().fetch_metadata)
+
 # Основные функции обработки
 class ReferenceProcessor:
     """Основной процессор для обработки ссылок"""
@@ -2197,13 +4163,17 @@ class ReferenceProcessor:
         # Обработка результатов
         doi_to_metadata = dict(zip(valid_dois, metadata_results))
         
+        # Один форматировщик и одно сокращение названий журналов на весь пакет
+        formatter = CitationFormatterFactory.create_formatter(style_config)
+        formatter.prepare_journal_names([metadata.get('journal') for metadata in metadata_results if metadata])
+        
         for i, ref in enumerate(references):
             if i in reference_doi_map:
                 doi = reference_doi_map[i]
                 metadata = doi_to_metadata.get(doi)
                 
                 if metadata:
-                    formatted_ref, is_error = self._format_reference(metadata, style_config)
+                    formatted_ref, is_error = self._format_reference(metadata, style_config, formatter)
                     formatted_refs.append((formatted_ref, is_error, metadata))
                 else:
                     error_msg = self._create_error_message(ref, st.session_state.current_language)
@@ -2217,18 +4187,44 @@ class ReferenceProcessor:
         """Пакетное извлечение метаданных"""
         results = [None] * len(doi_list)
         
+        # Один запрос к кэшу на весь пакет до планирования сетевых запросов
+        cached, stale = self.doi_processor.cache.lookup_many(doi_list)
+        logger.info(f"Cache hits: {len(cached)} of {len(set(doi_list))} DOIs ({len(stale)} stale)")
+        if stale:
+            # Устаревшие записи используются сразу и обновляются в фоне
+            get_cache_refresher().schedule(stale)
+        # DOI с недавней неудачей в сеть не отправляются
+        known_failures = self.doi_processor.negative_cache.get_many(
+            'doi', [doi for doi in doi_list if doi not in cached]
+        )
+        if known_failures:
+            logger.info(f"Skipping {len(known_failures)} DOIs with recent failures")
+        pending_indices = []
+        for i, doi in enumerate(doi_list):
+            if doi in cached:
+                results[i] = cached[doi]
+            elif doi not in known_failures:
+                pending_indices.append(i)
+        
+        completed = len(doi_list) - len(pending_indices)
+        self._update_progress_display(progress_bar, status_display, completed, len(doi_list), 0)
+        
+        # Потоки выполняют только сетевые запросы. Каждый результат сразу ставится
+        # в очередь записи кэша (пишет поток-писатель пакетами), чтобы прерванный
+        # пакет не терял уже полученные из Crossref данные
         with concurrent.futures.ThreadPoolExecutor(max_workers=Config.CROSSREF_WORKERS) as executor:
             future_to_index = {
-                executor.submit(self.doi_processor.extract_metadata_with_cache, doi): i 
-                for i, doi in enumerate(doi_list)
+                executor.submit(self.doi_processor.fetch_metadata, doi_list[i]): i 
+                for i in pending_indices
             }
             
-            completed = 0
             for future in concurrent.futures.as_completed(future_to_index):
                 index = future_to_index[future]
                 try:
-                    result = future.result(timeout=Config.REQUEST_TIMEOUT)
+                    result, raw = future.result(timeout=Config.REQUEST_TIMEOUT)
                     results[index] = result
+                    if result:
+                        self.doi_processor.cache.set(doi_list[index], result, raw)
                 except Exception as e:
                     logger.error(f"Error processing DOI at index {index}: {e}")
                     results[index] = None
@@ -2236,8 +4232,15 @@ class ReferenceProcessor:
                 completed += 1
                 self._update_progress_display(progress_bar, status_display, completed, len(doi_list), 0)
         
-        # Повторная попытка для неудачных запросов
-        failed_indices = [i for i, result in enumerate(results) if result is None]
+        # Повторная попытка только для временных неудач этого запуска
+        attempted = set(pending_indices)
+        failures = self.doi_processor.negative_cache.get_many(
+            'doi', [doi_list[i] for i in attempted if results[i] is None]
+        )
+        failed_indices = [
+            i for i in sorted(attempted)
+            if results[i] is None and failures.get(doi_list[i], NegativeCache.TIMEOUT) in NegativeCache.TRANSIENT_REASONS
+        ]
         if failed_indices:
             logger.info(f"Retrying {len(failed_indices)} failed DOI requests")
             self._retry_failed_requests(failed_indices, doi_list, results, progress_bar, status_display)
@@ -2252,14 +4255,16 @@ class ReferenceProcessor:
             retry_futures = {}
             for index in failed_indices:
                 doi = doi_list[index]
-                future = executor.submit(self.doi_processor.extract_metadata_with_cache, doi)
+                future = executor.submit(self.doi_processor.fetch_metadata, doi)
                 retry_futures[future] = index
             
             for future in concurrent.futures.as_completed(retry_futures):
                 index = retry_futures[future]
                 try:
-                    result = future.result(timeout=Config.REQUEST_TIMEOUT)
+                    result, raw = future.result(timeout=Config.REQUEST_TIMEOUT)
                     results[index] = result
+                    if result:
+                        self.doi_processor.cache.set(doi_list[index], result, raw)
                 except Exception as e:
                     logger.error(f"Error in retry processing DOI at index {index}: {e}")
                     results[index] = None
@@ -2293,9 +4298,11 @@ class ReferenceProcessor:
         
         status_display.text(status_text)
     
-    def _format_reference(self, metadata: Dict, style_config: Dict) -> Tuple[Any, bool]:
+    def _format_reference(self, metadata: Dict, style_config: Dict,
+                          formatter: Optional[BaseCitationFormatter] = None) -> Tuple[Any, bool]:
         """Форматирование ссылки"""
-        formatter = CitationFormatterFactory.create_formatter(style_config)
+        if formatter is None:
+            formatter = CitationFormatterFactory.create_formatter(style_config)
         return formatter.format_reference(metadata, False)
     
     def _find_duplicates(self, formatted_refs: List) -> Dict[int, int]:
@@ -3756,15 +5763,46 @@ class CitationStyleApp:
             with col_cache[0]:
                 if st.button("Initialize Cache", use_container_width=True):
                     doi_cache.clear_old_entries()
+                    negative_cache.clear_expired()
+                    resolution_cache.clear_expired()
                     st.success(get_text('cache_initialized'))
             with col_cache[1]:
                 if st.button("Clear Cache", use_container_width=True):
-                    try:
-                        os.remove(Config.DB_PATH)
+                    if doi_cache.clear() and negative_cache.clear() and resolution_cache.clear():
                         st.success(get_text('cache_cleared'))
-                    except Exception as e:
-                        st.error(f"Error clearing cache: {e}")
-    
+                    else:
+                        st.error("Error clearing cache, see the log for details")
+            
+            memo_stats = journal_abbrev.memo.stats()
+            st.caption(
+                f"Journal abbreviations: {memo_stats['size']}/{memo_stats['max_entries']} cached, "
+                f"hits {memo_stats['hits']}, misses {memo_stats['misses']}, "
+                f"evictions {memo_stats['evictions']}, hit rate {memo_stats['hit_rate']:.0%}"
+            )
+            cache_stats = doi_cache.stats()
+            memory_stats, disk_stats = cache_stats['memory'], cache_stats['disk']
+            st.caption(
+                f"DOI metadata in memory: {memory_stats['size']}/{memory_stats['max_entries']} entries, "
+                f"{memory_stats['bytes'] / 1024 / 1024:.1f}/{memory_stats['max_bytes'] / 1024 / 1024:.0f} MB, "
+                f"hits {memory_stats['hits']}, misses {memory_stats['misses']}, "
+                f"hit rate {memory_stats['hit_rate']:.0%}; "
+                f"SQLite: hits {disk_stats['hits']}, stale hits {disk_stats['stale_hits']}, "
+                f"misses {disk_stats['misses']}, "
+                f"evictions {disk_stats['evictions']}, hit rate {disk_stats['hit_rate']:.0%}"
+            )
+            bloom_stats = cache_stats['bloom']
+            if Config.CACHE_BLOOM_ENABLED:
+                st.caption(
+                    f"DOI Bloom filter: {bloom_stats['keys']} keys, {bloom_stats['skipped']} SQLite probes skipped, "
+                    f"false positive rate {bloom_stats['false_positive_rate']:.2%} "
+                    f"(expected {bloom_stats['expected_false_positive_rate']:.2%})"
+                )
+            refresh_stats = get_cache_refresher().stats()
+            st.caption(
+                f"Background refresh of stale entries: {refresh_stats['in_flight']} in flight, "
+                f"{refresh_stats['refreshed']} refreshed, {refresh_stats['failed']} failed"
+            )
+
     def _export_style(self, style_config, file_name):
         """Экспорт стиля"""
         try:
@@ -4002,11 +6040,67 @@ def apply_imported_style(imported_style):
     app = CitationStyleApp()
     app._apply_imported_style(imported_style)
 
+def build_ltwa_snapshot(snapshot_path: str = Config.LTWA_SNAPSHOT_PATH) -> int:
+    """Собирает снимок LTWA из ltwa.csv и возвращает число записей"""
+    abbreviations = JournalAbbreviation(use_snapshot=False)
+    abbreviations.save_snapshot(snapshot_path)
+    return len(abbreviations.ltwa_data)
+
+def run_cli(argv: List[str]) -> int:
+    """Служебные команды: python app.py <команда>"""
+    parser = argparse.ArgumentParser(prog='app.py', description='Citation Style Constructor maintenance commands')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    snapshot_parser = subparsers.add_parser('build-ltwa-snapshot', help='Compile ltwa.csv into a binary snapshot')
+    snapshot_parser.add_argument('--output', default=Config.LTWA_SNAPSHOT_PATH)
+    
+    subparsers.add_parser('precompute-abbreviations', help='Abbreviate every journal stored in the DOI cache')
+    
+    export_parser = subparsers.add_parser('export-cache', help='Export the DOI cache to gzip JSONL')
+    export_parser.add_argument('output')
+    
+    import_parser = subparsers.add_parser('import-cache', help='Merge a gzip JSONL export into the DOI cache')
+    import_parser.add_argument('input')
+    
+    migrate_parser = subparsers.add_parser('migrate', help='Upgrade DOI cache rows to the current format in batches')
+    migrate_parser.add_argument('--batch-size', type=int, default=1000)
+    
+    subparsers.add_parser('enable-incremental-vacuum',
+                          help='Rewrite the DOI cache database once so freed pages can be returned incrementally')
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == 'build-ltwa-snapshot':
+        count = build_ltwa_snapshot(args.output)
+        print(f"LTWA snapshot written to {args.output}: {count} entries")
+    elif args.command == 'precompute-abbreviations':
+        journals = doi_cache.distinct_journals()
+        count = journal_abbrev.precompute(journals)
+        print(f"Stored {count} abbreviations for {len(journals)} journals")
+    elif args.command == 'export-cache':
+        count = doi_cache.export_jsonl(args.output)
+        print(f"Exported {count} DOI cache entries to {args.output}")
+    elif args.command == 'import-cache':
+        read, written = doi_cache.import_jsonl(args.input)
+        print(f"Imported {written} of {read} DOI cache entries from {args.input} (older duplicates skipped)")
+    elif args.command == 'migrate':
+        count = doi_cache.migrate(args.batch_size)
+        print(f"Migrated {count} DOI cache entries to schema version {DOICache.SCHEMA_VERSION}")
+    elif args.command == 'enable-incremental-vacuum':
+        if doi_cache.enable_incremental_vacuum():
+            print(f"{doi_cache.db_path} switched to incremental auto-vacuum")
+        else:
+            print(f"{doi_cache.db_path} was not switched: it already uses incremental auto-vacuum or the switch failed (see the log)")
+    
+    return 0
+
 def main():
     """Основная функция"""
     app = CitationStyleApp()
     app.run()
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and not st.runtime.exists():
+        sys.exit(run_cli(sys.argv[1:]))
     main()
 
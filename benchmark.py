@@ -0,0 +1,134 @@
+"""Микробенчмарки оптимизаций app.py.
+
+Запуск: python benchmark.py <matchers|payloads> [--count N]. Прежние реализации
+хранятся здесь только для сравнения и в приложении не используются.
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from typing import List, Dict
+
+from app import DOICache, DOIProcessor, journal_abbrev
+
+def _time_per_call(func, items: List[str]) -> float:
+    """Среднее время одного вызова в микросекундах"""
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+def benchmark_matchers(count: int = 10000) -> Dict[str, Dict[str, float]]:
+    """Сравнивает перебор шаблонов с единым выражением на синтетическом корпусе названий"""
+    rng = random.Random(0)
+    words = [word for word in journal_abbrev.ltwa_data if word.isalpha()]
+    endings = ['', '', '', ' A', ' B', ' II', ' IV', ' XX', ' Part B', ' Part 2', ' A: General', ' C: Materials']
+    headers = ['References', 'NOTES AND REFERENCES', 'Chapter 3', 'Works cited', 'Part 12']
+    titles = [
+        " ".join(rng.choice(words).capitalize() for _ in range(rng.randint(2, 6))) + rng.choice(endings)
+        for _ in range(count)
+    ]
+    paragraphs = [rng.choice(headers) if i % 20 == 0 else title for i, title in enumerate(titles)]
+    
+    # Прежняя реализация: отдельный re.search для каждого шаблона
+    ending_patterns = [r'\s+([A-Z])\s*$', r'\s+([IVX]+)\s*$', r'\s+Part\s+([A-Z0-9]+)\s*$', r'\s+([A-Z]):\s+[A-Z]']
+    header_patterns = [
+        r'^NOTES?\s+AND\s+REFERENCES?$', r'^REFERENCES?$', r'^BIBLIOGRAPHY$', r'^LITERATURE$',
+        r'^WORKS?\s+CITED$', r'^SOURCES?$', r'^CHAPTER\s+\d+$', r'^SECTION\s+\d+$', r'^PART\s+\d+$'
+    ]
+    
+    def sequential_endings(journal_name):
+        for pattern in ending_patterns:
+            match = re.search(pattern, journal_name)
+            if match:
+                ending = match.group(1)
+                if ending in journal_abbrev.special_endings or re.match(r'^[A-Z]$', ending):
+                    return journal_name[:match.start()].strip(), ending
+        return journal_name, ""
+    
+    def sequential_header(text):
+        text_upper = text.upper().strip()
+        return any(re.search(pattern, text_upper) for pattern in header_patterns)
+    
+    doi_processor = DOIProcessor()
+    if [sequential_endings(t) for t in titles] != [journal_abbrev.extract_special_endings(t) for t in titles]:
+        raise AssertionError("extract_special_endings differs from the sequential patterns")
+    if [sequential_header(p) for p in paragraphs] != [doi_processor._is_section_header(p) for p in paragraphs]:
+        raise AssertionError("_is_section_header differs from the sequential patterns")
+    
+    return {
+        'extract_special_endings': {
+            'before_us': _time_per_call(sequential_endings, titles),
+            'after_us': _time_per_call(journal_abbrev.extract_special_endings, titles)
+        },
+        '_is_section_header': {
+            'before_us': _time_per_call(sequential_header, paragraphs),
+            'after_us': _time_per_call(doi_processor._is_section_header, paragraphs)
+        }
+    }
+
+def benchmark_payloads(count: int = 2000) -> Dict[str, Dict[str, float]]:
+    """Сравнивает JSON-текст и сжатый формат doi_cache: размер, кодирование, декодирование"""
+    rng = random.Random(0)
+    words = [word for word in journal_abbrev.ltwa_data if word.isalpha()]
+    
+    def synthetic_metadata(i):
+        # Как у Crossref: от нескольких авторов до сотен в коллаборациях
+        author_count = rng.choice([1, 3, 5, 8, 12, 40, 300])
+        return {
+            'authors': [
+                {'given': rng.choice(words).capitalize(), 'family': rng.choice(words).capitalize()}
+                for _ in range(author_count)
+            ],
+            'title': " ".join(rng.choice(words) for _ in range(rng.randint(6, 18))).capitalize(),
+            'journal': " ".join(rng.choice(words).capitalize() for _ in range(rng.randint(2, 5))),
+            'year': rng.randint(1950, 2025),
+            'volume': str(rng.randint(1, 300)),
+            'issue': str(rng.randint(1, 12)),
+            'pages': f"{rng.randint(1, 900)}-{rng.randint(901, 2000)}",
+            'article_number': '',
+            'doi': f"10.{rng.randint(1000, 9999)}/{i}",
+            'original_doi': f"10.{rng.randint(1000, 9999)}/{i}"
+        }
+    
+    records = [synthetic_metadata(i) for i in range(count)]
+    texts = [json.dumps(metadata) for metadata in records]
+    payloads = [DOICache._encode_payload(metadata)[0] for metadata in records]
+    if [DOICache._decode_payload(payload)[0] for payload in payloads] != records:
+        raise AssertionError("compressed payloads do not round-trip")
+    
+    return {
+        'encode': {
+            'before_us': _time_per_call(json.dumps, records),
+            'after_us': _time_per_call(DOICache._encode_payload, records)
+        },
+        'decode': {
+            'before_us': _time_per_call(json.loads, texts),
+            'after_us': _time_per_call(DOICache._decode_payload, payloads)
+        },
+        'size': {
+            'before_bytes': sum(len(text.encode('utf-8')) for text in texts) / count,
+            'after_bytes': sum(len(payload) for payload in payloads) / count
+        }
+    }
+
+def main(argv: List[str]) -> int:
+    """Запускает выбранный бенчмарк и печатает результаты до и после"""
+    parser = argparse.ArgumentParser(prog='benchmark.py', description='Citation Style Constructor microbenchmarks')
+    parser.add_argument('target', choices=['matchers', 'payloads'])
+    parser.add_argument('--count', type=int, default=None)
+    args = parser.parse_args(argv)
+    
+    benchmark = benchmark_matchers if args.target == 'matchers' else benchmark_payloads
+    results = benchmark(args.count) if args.count else benchmark()
+    for name, timings in results.items():
+        if 'before_bytes' in timings:
+            print(f"{name}: {timings['before_bytes']:.0f} B -> {timings['after_bytes']:.0f} B per record")
+        else:
+            print(f"{name}: {timings['before_us']:.2f} us -> {timings['after_us']:.2f} us per call")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))